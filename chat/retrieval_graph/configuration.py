@@ -31,13 +31,27 @@ class IndexConfiguration:
         },
     )
 
+    embedding_dimensions: Optional[int] = field(
+        default=None,
+        metadata={
+            "description": "Number of dimensions to request from the embedding model (e.g. 256 or 512 for text-embedding-3). Defaults to EMBEDDING_DIMENSIONS and must match the stored vectors."
+        },
+    )
+
     retriever_provider: Annotated[
-        Literal["elastic", "elastic-local", "pinecone", "mongodb"],
+        Literal["elastic", "elastic-local", "pinecone", "mongodb", "local"],
         {"__template_metadata__": {"kind": "retriever"}},
     ] = field(
         default="mongodb",
         metadata={
-            "description": "The vector store provider to use for retrieval. Options are 'elastic', 'pinecone', or 'mongodb'."
+            "description": "The vector store provider to use for retrieval. Options are 'elastic', 'pinecone', 'mongodb', or 'local' (an in-process index built from news_articles)."
+        },
+    )
+
+    search_mode: Literal["vector", "hybrid"] = field(
+        default="vector",
+        metadata={
+            "description": "How the MongoDB retriever ranks documents. 'hybrid' fuses lexical search over title/snippet with vector search."
         },
     )
 
@@ -99,3 +113,24 @@ class Configuration(IndexConfiguration):
             "description": "The language model used for processing and refining queries. Should be in the form: provider/model-name."
         },
     )
+
+    num_queries: int = field(
+        default=3,
+        metadata={
+            "description": "The maximum number of sub-queries generated per turn. Set to 1 to disable multi-query retrieval."
+        },
+    )
+
+    max_concurrent_retrievals: int = field(
+        default=4,
+        metadata={
+            "description": "The maximum number of sub-queries sent to the retriever concurrently."
+        },
+    )
+
+    rrf_k: int = field(
+        default=60,
+        metadata={
+            "description": "The rank offset used by reciprocal-rank fusion when merging results from several sub-queries."
+        },
+    )
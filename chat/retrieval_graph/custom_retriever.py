@@ -1,70 +1,235 @@
+import asyncio
+import logging
 from typing import List, AsyncGenerator
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
 from langchain_core.runnables import RunnableConfig
 from pymongo import MongoClient
+from pymongo.errors import OperationFailure
 from contextlib import contextmanager
 
+from chat.retrieval_graph.hybrid import HybridSearchEngine, cosine_similarity
+from config.config_loader import EMBEDDING_STORAGE, MONGO_DB_NAME, MONGO_URI
+from database.db_setup import get_mongo_connection, mongo_client_options
+from database.embedding_codec import (
+    FULL_PRECISION_FIELD,
+    encode_embedding,
+    full_precision_embedding,
+)
+
+logger = logging.getLogger(__name__)
+
+# Fields that may hold the text of a stored document, in order of preference
+CONTENT_FIELDS = ("content", "text", "page_content", "snippet", "title")
+
+
+def _rank_stages(weight: float, rrf_k: int, score_field: str) -> list:
+    """Stages that turn an ordered result set into weighted reciprocal-rank scores.
+
+    Mirrors `hybrid.rrf_score` so the Atlas pipeline and the offline engine agree.
+    """
+    return [
+        {"$group": {"_id": None, "docs": {"$push": "$$ROOT"}}},
+        {"$unwind": {"path": "$docs", "includeArrayIndex": "rank"}},
+        {
+            "$replaceRoot": {
+                "newRoot": {
+                    "$mergeObjects": [
+                        "$docs",
+                        {
+                            score_field: {
+                                "$divide": [weight, {"$add": ["$rank", rrf_k, 1]}]
+                            }
+                        },
+                    ]
+                }
+            }
+        },
+    ]
+
+
 class CustomMongoDBRetriever:
-    def __init__(self, mongo_uri: str, embedding_model: Embeddings, search_kwargs: dict = None):
-        self.client = MongoClient(mongo_uri)
-        self.db = self.client["content_db"]
+    def __init__(
+        self,
+        mongo_uri: str,
+        embedding_model: Embeddings,
+        search_kwargs: dict = None,
+        search_mode: str = "vector",
+    ):
+        # Reuse the process-wide pool unless pointed at a different deployment
+        self._owns_client = mongo_uri != MONGO_URI
+        self.client = MongoClient(mongo_uri, **mongo_client_options()) if self._owns_client else get_mongo_connection()
+        self.db = self.client[MONGO_DB_NAME]
         self.collection = self.db["news_articles"]
         self.embedding_model = embedding_model
         self.search_kwargs = search_kwargs or {
             "k": 4,
             "numCandidates": 100
         }
+        self.search_mode = search_mode
+        self.embedding_storage = self.search_kwargs.get("embedding_storage", EMBEDDING_STORAGE)
 
-    async def ainvoke(self, query: str, config: RunnableConfig) -> List[Document]:
-        """Async invoke method that matches the exact interface expected by the retrieve function."""
-        # Generate embedding for the query
-        embedding = self.embedding_model.embed_query(query)
-        
-        # Perform vector search
-        pipeline = [
+    def _projection(self) -> dict:
+        return {name: 1 for name in CONTENT_FIELDS}
+
+    def _vector_pipeline(self, embedding: list, limit: int) -> list:
+        return [
             {
                 "$vectorSearch": {
-                    "index": "vector_index",
+                    "index": self.search_kwargs.get("vector_index", "vector_index"),
                     "path": "embedding",
-                    "queryVector": embedding,
-                    "numCandidates": self.search_kwargs.get("numCandidates", 100),
-                    "limit": self.search_kwargs.get("k", 4)
+                    "queryVector": encode_embedding(embedding, self.embedding_storage),
+                    "numCandidates": max(self.search_kwargs.get("numCandidates", 100), limit),
+                    "limit": limit
                 }
             },
             {
                 "$project": {
                     "score": {"$meta": "vectorSearchScore"},
-                    "text": 1,
-                    "content": 1,
-                    "page_content": 1,
-                    "title": 1,
-                    "_id": 0
+                    **self._projection(),
+                    "_id": 1
                 }
             }
         ]
 
-        results = list(self.collection.aggregate(pipeline))
-        
+    def _hybrid_pipeline(self, query: str, embedding: list) -> list:
+        """Build a single aggregation fusing `$vectorSearch` and `$search` results.
+
+        Each branch is ranked independently and scored with weighted reciprocal-rank
+        fusion; `$unionWith` brings both into one stream that is grouped per
+        document, summed and sorted.
+        """
+        k = self.search_kwargs.get("k", 4)
+        rrf_k = self.search_kwargs.get("rrf_k", 60)
+        candidates = self.search_kwargs.get("hybrid_candidates", max(k * 5, 20))
+        vector_weight = self.search_kwargs.get("vector_weight", 1.0)
+        text_weight = self.search_kwargs.get("text_weight", 1.0)
+        projection = self._projection()
+
+        text_branch = [
+            {
+                "$search": {
+                    "index": self.search_kwargs.get("text_index", "text_index"),
+                    "text": {"query": query, "path": ["title", "snippet"]},
+                }
+            },
+            {"$limit": candidates},
+            {"$project": {**projection, "_id": 1}},
+            *_rank_stages(text_weight, rrf_k, "text_score"),
+        ]
+
+        return [
+            *self._vector_pipeline(embedding, candidates),
+            {"$project": {**projection, "_id": 1}},
+            *_rank_stages(vector_weight, rrf_k, "vector_score"),
+            {"$unionWith": {"coll": self.collection.name, "pipeline": text_branch}},
+            {
+                "$group": {
+                    "_id": "$_id",
+                    **{name: {"$first": f"${name}"} for name in projection},
+                    "vector_score": {"$max": "$vector_score"},
+                    "text_score": {"$max": "$text_score"},
+                }
+            },
+            {
+                "$addFields": {
+                    "score": {
+                        "$add": [
+                            {"$ifNull": ["$vector_score", 0]},
+                            {"$ifNull": ["$text_score", 0]},
+                        ]
+                    }
+                }
+            },
+            {"$sort": {"score": -1, "_id": 1}},
+            {"$limit": k},
+        ]
+
+    def _rescore(self, embedding: list, limit: int) -> list:
+        """Search the quantized index for extra candidates and rescore them at full precision.
+
+        Quantized vectors only approximate the original ranking, so the top
+        `k * rescore_factor` candidates are re-ranked by exact cosine similarity
+        against their stored float32 copy.
+        """
+        factor = self.search_kwargs.get("rescore_factor", 4)
+        pipeline = self._vector_pipeline(embedding, limit * factor)
+        pipeline[-1]["$project"][FULL_PRECISION_FIELD] = 1
+        candidates = list(self.collection.aggregate(pipeline))
+        for doc in candidates:
+            # Documents without a float32 copy keep their quantized score
+            if doc.get(FULL_PRECISION_FIELD) is not None:
+                doc["score"] = cosine_similarity(embedding, full_precision_embedding(doc))
+            doc.pop(FULL_PRECISION_FIELD, None)
+        candidates.sort(key=lambda doc: -(doc.get("score") or 0.0))
+        return candidates[:limit]
+
+    def _rerank_locally(self, query: str, embedding: list) -> list:
+        """Fallback when `$search` is unavailable: fuse lexical scores in Python.
+
+        Vector candidates are fetched with their embeddings and re-ranked by the
+        pure-Python hybrid engine using the same fusion formula.
+        """
+        k = self.search_kwargs.get("k", 4)
+        candidates = self.search_kwargs.get("hybrid_candidates", max(k * 5, 20))
+        pipeline = self._vector_pipeline(embedding, candidates)
+        pipeline[-1]["$project"].update({"embedding": 1, FULL_PRECISION_FIELD: 1})
+        records = [
+            {**record, "embedding": full_precision_embedding(record)}
+            for record in self.collection.aggregate(pipeline)
+        ]
+        engine = HybridSearchEngine(
+            records, rrf_k=self.search_kwargs.get("rrf_k", 60)
+        )
+        return [
+            {**record, "score": score}
+            for record, score in engine.search(
+                query,
+                embedding,
+                k=k,
+                num_candidates=candidates,
+                vector_weight=self.search_kwargs.get("vector_weight", 1.0),
+                text_weight=self.search_kwargs.get("text_weight", 1.0),
+            )
+        ]
+
+    def _search(self, query: str, embedding: list) -> list:
+        if self.search_mode != "hybrid":
+            k = self.search_kwargs.get("k", 4)
+            if self.embedding_storage != "float" and self.search_kwargs.get("rescore", True):
+                return self._rescore(embedding, k)
+            pipeline = self._vector_pipeline(embedding, k)
+            return list(self.collection.aggregate(pipeline))
+        try:
+            return list(self.collection.aggregate(self._hybrid_pipeline(query, embedding)))
+        except OperationFailure as e:
+            logger.warning(f"Hybrid aggregation failed, re-ranking locally: {e}")
+            return self._rerank_locally(query, embedding)
+
+    async def ainvoke(self, query: str, config: RunnableConfig) -> List[Document]:
+        """Async invoke method that matches the exact interface expected by the retrieve function."""
+        # Generate embedding for the query without blocking the event loop, so
+        # several sub-queries can be retrieved concurrently
+        embedding = await self.embedding_model.aembed_query(query)
+
+        # pymongo is synchronous, so run the search in a worker thread
+        results = await asyncio.to_thread(self._search, query, embedding)
+
         # Convert to Documents
         documents = []
         for doc in results:
-            content = (
-                doc.get("content") or 
-                doc.get("text") or 
-                doc.get("page_content") or 
-                doc.get("title", "")
-            )
+            content = next((doc[name] for name in CONTENT_FIELDS if doc.get(name)), "")
             if content:
                 documents.append(Document(
                     page_content=content,
-                    metadata={"score": doc.get("score")}
+                    metadata={"id": str(doc["_id"]), "score": doc.get("score")}
                 ))
-        
+
         return documents
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.client.close()
\ No newline at end of file
+        if self._owns_client:
+            self.client.close()
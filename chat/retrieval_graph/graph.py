@@ -20,7 +20,12 @@ from langgraph.graph import StateGraph
 from chat.retrieval_graph import retrieval
 from chat.retrieval_graph.configuration import Configuration
 from chat.retrieval_graph.state import InputState, State
-from chat.retrieval_graph.utils import format_docs, get_message_text, load_chat_model
+from chat.retrieval_graph.utils import (
+    format_docs,
+    get_message_text,
+    load_chat_model,
+    reciprocal_rank_fusion,
+)
 from chat.retrieval_graph.redis_functions import *
 
 import asyncio
@@ -34,6 +39,12 @@ class SearchQuery(BaseModel):
     query: str
 
 
+class SearchQueries(BaseModel):
+    """Search the indexed documents for several complementary sub-queries."""
+
+    queries: list[str]
+
+
 async def generate_query(
     state: State, *, config: RunnableConfig
 ) -> dict[str, list[str]]:
@@ -41,7 +52,8 @@ async def generate_query(
 
     This function analyzes the messages in the state and generates an appropriate
     search query. For the first message, it uses the user's input directly.
-    For subsequent messages, it uses a language model to generate a refined query.
+    For subsequent messages, it uses a language model to generate refined queries,
+    emitting up to `num_queries` sub-queries that the retriever runs concurrently.
 
     Args:
         state (State): The current state containing messages and other information.
@@ -52,14 +64,15 @@ async def generate_query(
 
     Behavior:
         - If there's only one message (first user input), it uses that as the query.
-        - For subsequent messages, it uses a language model to generate a refined query.
+        - For subsequent messages, it uses a language model to generate refined queries.
+        - When `num_queries` is 1, a single query is generated as before.
         - The function uses the configuration to set up the prompt and model for query generation.
     """
     messages = state.messages
     if len(messages) == 1:
         # It's the first user question. We will use the input directly to search.
         human_input = get_message_text(messages[-1])
-        return {"queries": [human_input]}
+        return {"queries": [human_input], "current_queries": [human_input]}
     else:
         configuration = Configuration.from_runnable_config(config)
         # Feel free to customize the prompt, model, and other logic!
@@ -69,8 +82,9 @@ async def generate_query(
                 ("placeholder", "{messages}"),
             ]
         )
+        multi_query = configuration.num_queries > 1
         model = load_chat_model(configuration.query_model).with_structured_output(
-            SearchQuery
+            SearchQueries if multi_query else SearchQuery
         )
 
         message_value = await prompt.ainvoke(
@@ -81,20 +95,32 @@ async def generate_query(
             },
             config,
         )
-        generated = cast(SearchQuery, await model.ainvoke(message_value, config))
+        generated = await model.ainvoke(message_value, config)
+        if multi_query:
+            queries = cast(SearchQueries, generated).queries
+            # Drop blanks and duplicates while keeping the model's ordering.
+            queries = list(dict.fromkeys(q.strip() for q in queries if q.strip()))
+            queries = queries[: configuration.num_queries]
+        else:
+            queries = [cast(SearchQuery, generated).query]
+        if not queries:
+            queries = [get_message_text(messages[-1])]
         return {
-            "queries": [generated.query],
+            "queries": queries,
+            "current_queries": queries,
         }
 
 
 async def retrieve(
     state: State, *, config: RunnableConfig
 ) -> dict[str, list[Document]]:
-    """Retrieve documents based on the latest query in the state.
+    """Retrieve documents for every sub-query generated in the current turn.
 
-    This function takes the current state and configuration, uses the latest query
-    from the state to retrieve relevant documents using the retriever, and returns
-    the retrieved documents.
+    The sub-queries are sent to the retriever concurrently (at most
+    `max_concurrent_retrievals` at a time) and the ranked result lists are merged
+    with reciprocal-rank fusion, dropping duplicates and keeping the top `k`
+    documents so the response prompt stays the same size. When only one query is
+    available this reduces to a single retriever call.
 
     Args:
         state (State): The current state containing queries and the retriever.
@@ -104,9 +130,26 @@ async def retrieve(
         dict[str, list[Document]]: A dictionary with a single key "retrieved_docs"
         containing a list of retrieved Document objects.
     """
+    configuration = Configuration.from_runnable_config(config)
+    queries = state.current_queries or state.queries[-1:]
+    semaphore = asyncio.Semaphore(max(1, configuration.max_concurrent_retrievals))
+
     with retrieval.make_retriever(config) as retriever:
-        response = await retriever.ainvoke(state.queries[-1], config)
-        return {"retrieved_docs": response}
+
+        async def _search(query: str) -> list[Document]:
+            async with semaphore:
+                return await retriever.ainvoke(query, config)
+
+        if len(queries) == 1:
+            return {"retrieved_docs": await _search(queries[0])}
+
+        results = await asyncio.gather(*(_search(query) for query in queries))
+        fused = reciprocal_rank_fusion(
+            results,
+            k=configuration.rrf_k,
+            limit=configuration.search_kwargs.get("k", 4),
+        )
+        return {"retrieved_docs": fused}
 
 
 async def respond(
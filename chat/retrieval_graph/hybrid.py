@@ -0,0 +1,173 @@
+"""Pure-Python hybrid (lexical + vector) search.
+
+This module scores documents with BM25 over their text fields and with cosine
+similarity over their embeddings, then fuses both rankings with weighted
+reciprocal-rank fusion. The fusion formula matches the one used by the MongoDB
+hybrid aggregation in `custom_retriever`, so the engine can stand in for Atlas
+when `$search` is unavailable and can be exercised offline in tests.
+
+Classes:
+    BM25Index: An in-memory BM25 index over a set of records.
+    HybridSearchEngine: Combines BM25 and vector rankings for a set of records.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Any, Iterable, Optional, Sequence
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lowercase alphanumeric tokens.
+
+    Examples:
+        >>> tokenize("NVDA earnings beat; Q3 guidance up")
+        ['nvda', 'earnings', 'beat', 'q3', 'guidance', 'up']
+    """
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def cosine_similarity(a: Sequence[float], b: Sequence[float]) -> float:
+    """Compute the cosine similarity between two vectors."""
+    dot = sum(x * y for x, y in zip(a, b))
+    norm_a = math.sqrt(sum(x * x for x in a))
+    norm_b = math.sqrt(sum(y * y for y in b))
+    if not norm_a or not norm_b:
+        return 0.0
+    return dot / (norm_a * norm_b)
+
+
+def rrf_score(rank: int, *, weight: float = 1.0, k: int = 60) -> float:
+    """Return the weighted reciprocal-rank score for a zero-based rank."""
+    return weight / (rank + k + 1)
+
+
+class BM25Index:
+    """An in-memory BM25 index over the text fields of a set of records.
+
+    Tokens from the first field (usually the title) can be boosted so that
+    short, entity-heavy headlines outrank incidental mentions in the body.
+    """
+
+    def __init__(
+        self,
+        records: Sequence[dict[str, Any]],
+        *,
+        text_fields: Sequence[str] = ("title", "snippet"),
+        title_boost: int = 2,
+        k1: float = 1.5,
+        b: float = 0.75,
+    ):
+        self.k1 = k1
+        self.b = b
+        self.term_freqs: list[Counter] = []
+        for record in records:
+            tokens: list[str] = []
+            for i, name in enumerate(text_fields):
+                field_tokens = tokenize(str(record.get(name) or ""))
+                tokens.extend(field_tokens * (title_boost if i == 0 else 1))
+            self.term_freqs.append(Counter(tokens))
+
+        self.doc_lengths = [sum(tf.values()) for tf in self.term_freqs]
+        self.avg_length = (
+            sum(self.doc_lengths) / len(self.doc_lengths) if self.doc_lengths else 0.0
+        )
+        doc_freqs: Counter = Counter()
+        for tf in self.term_freqs:
+            doc_freqs.update(tf.keys())
+        n = len(self.term_freqs)
+        self.idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for term, df in doc_freqs.items()
+        }
+
+    def score(self, query: str) -> list[float]:
+        """Score every record against the query, in record order."""
+        terms = [t for t in tokenize(query) if t in self.idf]
+        scores = []
+        for tf, length in zip(self.term_freqs, self.doc_lengths):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / (self.avg_length or 1.0))
+            for term in terms:
+                freq = tf.get(term)
+                if freq:
+                    score += self.idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            scores.append(score)
+        return scores
+
+
+class HybridSearchEngine:
+    """Hybrid lexical + vector search over in-memory records.
+
+    Records are plain dicts as stored in `news_articles`: they need a `_id`, the
+    configured text fields and, for the vector half, an `embedding` list.
+    """
+
+    def __init__(
+        self,
+        records: Iterable[dict[str, Any]],
+        *,
+        text_fields: Sequence[str] = ("title", "snippet"),
+        embedding_field: str = "embedding",
+        rrf_k: int = 60,
+    ):
+        self.records = list(records)
+        self.embedding_field = embedding_field
+        self.rrf_k = rrf_k
+        self.bm25 = BM25Index(self.records, text_fields=text_fields)
+
+    def _rank_text(self, query: str, limit: int) -> list[int]:
+        scores = self.bm25.score(query)
+        ranked = sorted(
+            (i for i, s in enumerate(scores) if s > 0), key=lambda i: -scores[i]
+        )
+        return ranked[:limit]
+
+    def _rank_vector(self, query_vector: Sequence[float], limit: int) -> list[int]:
+        scored = [
+            (i, cosine_similarity(query_vector, record[self.embedding_field]))
+            for i, record in enumerate(self.records)
+            if record.get(self.embedding_field)
+        ]
+        scored.sort(key=lambda pair: -pair[1])
+        return [i for i, _ in scored[:limit]]
+
+    def search(
+        self,
+        query: str,
+        query_vector: Optional[Sequence[float]] = None,
+        *,
+        k: int = 4,
+        num_candidates: int = 100,
+        vector_weight: float = 1.0,
+        text_weight: float = 1.0,
+    ) -> list[tuple[dict[str, Any], float]]:
+        """Return the top `k` records with their fused scores.
+
+        Args:
+            query (str): The raw query text, used for BM25 scoring.
+            query_vector (Optional[Sequence[float]]): The query embedding. When
+                omitted, only the lexical ranking contributes.
+            k (int): Number of records to return.
+            num_candidates (int): Number of candidates taken from each ranking.
+            vector_weight (float): Weight of the vector ranking in the fusion.
+            text_weight (float): Weight of the lexical ranking in the fusion.
+
+        Returns:
+            list[tuple[dict[str, Any], float]]: Records and scores, best first.
+        """
+        fused: dict[int, float] = {}
+        if query_vector is not None:
+            for rank, i in enumerate(self._rank_vector(query_vector, num_candidates)):
+                fused[i] = fused.get(i, 0.0) + rrf_score(
+                    rank, weight=vector_weight, k=self.rrf_k
+                )
+        for rank, i in enumerate(self._rank_text(query, num_candidates)):
+            fused[i] = fused.get(i, 0.0) + rrf_score(
+                rank, weight=text_weight, k=self.rrf_k
+            )
+
+        ordered = sorted(fused, key=lambda i: -fused[i])[:k]
+        return [(self.records[i], fused[i]) for i in ordered]
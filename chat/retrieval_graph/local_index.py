@@ -0,0 +1,420 @@
+"""In-process vector index for the `local` retriever provider.
+
+This module provides a small NumPy vector index that lives on local disk and is
+memory-mapped on load, so retrieval for small per-user corpora needs no network
+round trip. Two search strategies are supported:
+
+- ``flat``: exact cosine search over every vector.
+- ``ivf``: an inverted-file index. Vectors are clustered with spherical k-means
+  and stored grouped by cluster, so a query only scans the ``nprobe`` closest
+  clusters, each of which is a contiguous slice of the memory-mapped file.
+
+Indexes are stored one directory per user under ``LOCAL_INDEX_DIR`` and are
+populated from the embeddings already stored in ``news_articles``. Every save
+writes a new version subdirectory and then atomically repoints ``CURRENT`` at
+it, so files that another request or worker has memory-mapped are never
+overwritten and readers never see a mix of two builds. Each index
+records when it was built, and is rebuilt once it is older than
+``LOCAL_INDEX_MAX_AGE_SECONDS`` or the user's article count no longer matches it
+(checked at most every ``LOCAL_INDEX_CHECK_SECONDS``).
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Iterable, Literal, Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables import RunnableConfig
+
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", "./local_index")
+LOCAL_INDEX_MAX_AGE_SECONDS = float(os.getenv("LOCAL_INDEX_MAX_AGE_SECONDS", "3600"))
+LOCAL_INDEX_CHECK_SECONDS = float(os.getenv("LOCAL_INDEX_CHECK_SECONDS", "60"))
+
+IndexType = Literal["flat", "ivf"]
+
+# Name of the file holding the version directory an index directory currently serves
+CURRENT_FILE = "CURRENT"
+
+# Versions kept per index directory, so a reader that just followed the old pointer can still open it
+KEEP_VERSIONS = 2
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _spherical_kmeans(
+    vectors: np.ndarray, nlist: int, *, iterations: int = 10, seed: int = 0
+) -> tuple[np.ndarray, np.ndarray]:
+    """Cluster unit vectors by cosine similarity.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The unit-norm centroids and the cluster
+        assignment of every vector.
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=nlist, replace=False)].copy()
+    assignments = np.zeros(len(vectors), dtype=np.int64)
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        for c in range(nlist):
+            members = vectors[assignments == c]
+            if len(members):
+                centroids[c] = members.sum(axis=0)
+        centroids = _normalize(centroids)
+    return centroids, assignments
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Return the indices of the `k` highest scores, best first."""
+    if k >= len(scores):
+        return np.argsort(-scores)
+    candidates = np.argpartition(-scores, k)[:k]
+    return candidates[np.argsort(-scores[candidates])]
+
+
+class LocalVectorIndex:
+    """A cosine-similarity vector index held in (optionally memory-mapped) NumPy arrays.
+
+    Vectors are stored unit-normalized as float32, so cosine similarity is a dot
+    product. For IVF indexes the vectors are ordered by cluster and
+    `list_offsets[c]:list_offsets[c + 1]` is the slice belonging to cluster `c`.
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        *,
+        centroids: Optional[np.ndarray] = None,
+        list_offsets: Optional[np.ndarray] = None,
+        nprobe: int = 8,
+        built_at: Optional[float] = None,
+    ):
+        self.vectors = vectors
+        self.ids = list(ids)
+        self.texts = list(texts)
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.nprobe = nprobe
+        self.built_at = time.time() if built_at is None else built_at
+
+    @property
+    def index_type(self) -> IndexType:
+        """Return the search strategy used by this index."""
+        return "flat" if self.centroids is None else "ivf"
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(
+        cls,
+        vectors: Iterable[Sequence[float]],
+        ids: Sequence[str],
+        texts: Sequence[str],
+        *,
+        index_type: IndexType = "flat",
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        seed: int = 0,
+    ) -> "LocalVectorIndex":
+        """Build an index from raw embeddings.
+
+        Args:
+            vectors: One embedding per document.
+            ids: Document ids, aligned with `vectors`.
+            texts: Document texts, aligned with `vectors`.
+            index_type: ``"flat"`` for exact search or ``"ivf"`` for clustered search.
+            nlist: Number of IVF clusters. Defaults to roughly ``sqrt(n)``.
+            nprobe: Number of clusters scanned per IVF query.
+            seed: Seed for the k-means initialization.
+        """
+        matrix = _normalize(np.asarray(list(vectors), dtype=np.float32))
+        if index_type == "flat" or len(matrix) < 2:
+            return cls(matrix, ids, texts, nprobe=nprobe)
+
+        nlist = min(nlist or max(1, int(np.sqrt(len(matrix)))), len(matrix))
+        centroids, assignments = _spherical_kmeans(matrix, nlist, seed=seed)
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=nlist)
+        list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return cls(
+            matrix[order],
+            [ids[i] for i in order],
+            [texts[i] for i in order],
+            centroids=centroids.astype(np.float32),
+            list_offsets=list_offsets,
+            nprobe=nprobe,
+        )
+
+    def search(
+        self, query_vector: Sequence[float], k: int = 4, *, nprobe: Optional[int] = None
+    ) -> list[tuple[int, float]]:
+        """Return the positions and cosine scores of the `k` nearest documents."""
+        if not len(self):
+            return []
+        query = _normalize(np.asarray(query_vector, dtype=np.float32))
+
+        if self.centroids is None:
+            scores = self.vectors @ query
+            return [(int(i), float(scores[i])) for i in _top_k(scores, k)]
+
+        probes = _top_k(self.centroids @ query, nprobe or self.nprobe)
+        positions = np.concatenate(
+            [
+                np.arange(self.list_offsets[c], self.list_offsets[c + 1])
+                for c in probes
+            ]
+        )
+        if not len(positions):
+            return []
+        scores = self.vectors[positions] @ query
+        return [
+            (int(positions[i]), float(scores[i])) for i in _top_k(scores, k)
+        ]
+
+    def save(self, directory: str | os.PathLike) -> str:
+        """Write the index as a new version of `directory` and make it current.
+
+        Returns:
+            str: The name of the version directory that was written.
+        """
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        # Zero-padded nanoseconds, so versions sort by age
+        version = f"v{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        target = path / version
+        target.mkdir()
+        np.save(target / "vectors.npy", np.ascontiguousarray(self.vectors))
+        if self.centroids is not None:
+            np.save(target / "centroids.npy", self.centroids)
+            np.save(target / "list_offsets.npy", self.list_offsets)
+        with open(target / "meta.json", "w") as f:
+            json.dump(
+                {"ids": self.ids, "texts": self.texts, "nprobe": self.nprobe, "built_at": self.built_at},
+                f,
+            )
+
+        pointer = path / f".{CURRENT_FILE}.{version}.tmp"
+        pointer.write_text(version)
+        os.replace(pointer, path / CURRENT_FILE)
+
+        # Unlinking is safe for indexes still mapped from old versions; their pages stay valid
+        for old in sorted(p.name for p in path.iterdir() if p.is_dir() and p.name.startswith("v"))[:-KEEP_VERSIONS]:
+            shutil.rmtree(path / old, ignore_errors=True)
+        return version
+
+    @staticmethod
+    def current_version(directory: str | os.PathLike) -> Optional[str]:
+        """Return the version `directory` currently serves, or None if nothing was saved."""
+        try:
+            return (Path(directory) / CURRENT_FILE).read_text().strip() or None
+        except FileNotFoundError:
+            return None
+
+    @classmethod
+    def load(
+        cls, directory: str | os.PathLike, *, mmap: bool = True, version: Optional[str] = None
+    ) -> "LocalVectorIndex":
+        """Load an index written by `save`, memory-mapping the vectors by default.
+
+        Args:
+            directory: The directory passed to `save`.
+            mmap: Whether to memory-map the vectors instead of reading them.
+            version: The version to load. Defaults to the current one.
+        """
+        version = version or cls.current_version(directory)
+        if version is None:
+            raise FileNotFoundError(f"No local index saved in {directory}")
+        path = Path(directory) / version
+        with open(path / "meta.json") as f:
+            meta = json.load(f)
+        mmap_mode = "r" if mmap else None
+        centroids = list_offsets = None
+        if (path / "centroids.npy").exists():
+            centroids = np.load(path / "centroids.npy")
+            list_offsets = np.load(path / "list_offsets.npy")
+        return cls(
+            np.load(path / "vectors.npy", mmap_mode=mmap_mode),
+            meta["ids"],
+            meta["texts"],
+            centroids=centroids,
+            list_offsets=list_offsets,
+            nprobe=meta.get("nprobe", 8),
+            # Indexes saved without a build time are treated as stale
+            built_at=meta.get("built_at", 0.0),
+        )
+
+
+def user_index_dir(user_id: str) -> Path:
+    """Return the directory holding the local index for a user."""
+    return Path(LOCAL_INDEX_DIR) / str(user_id)
+
+
+def _user_articles_filter(user_id: str) -> dict:
+    from bson import ObjectId
+
+    return {"user_id._id": ObjectId(user_id), "embedding": {"$exists": True}}
+
+
+def build_user_index(
+    collection: Any,
+    user_id: str,
+    *,
+    index_type: IndexType = "flat",
+    nlist: Optional[int] = None,
+    nprobe: int = 8,
+) -> LocalVectorIndex:
+    """Build and save a user's local index from their `news_articles` embeddings.
+
+    Args:
+        collection: The `news_articles` collection.
+        user_id: The user whose articles are indexed.
+        index_type: ``"flat"`` or ``"ivf"``.
+        nlist: Number of IVF clusters.
+        nprobe: Number of clusters scanned per IVF query.
+    """
+    from database.embedding_codec import FULL_PRECISION_FIELD, full_precision_embedding
+
+    cursor = collection.find(
+        _user_articles_filter(user_id),
+        {"title": 1, "snippet": 1, "embedding": 1, FULL_PRECISION_FIELD: 1},
+    )
+    vectors, ids, texts = [], [], []
+    for doc in cursor:
+        vectors.append(full_precision_embedding(doc))
+        ids.append(str(doc["_id"]))
+        texts.append(doc.get("snippet") or doc.get("title", ""))
+
+    index = LocalVectorIndex.build(
+        vectors, ids, texts, index_type=index_type, nlist=nlist, nprobe=nprobe
+    )
+    index.save(user_index_dir(user_id))
+    return index
+
+
+# Loaded indexes, keyed by user id, with the version they were loaded from
+_loaded: dict[str, tuple[str, LocalVectorIndex]] = {}
+
+
+def load_user_index(user_id: str) -> Optional[LocalVectorIndex]:
+    """Return the memory-mapped index for a user, or None if it was never built.
+
+    Indexes are cached per process and reloaded when a newer version is saved.
+    """
+    version = LocalVectorIndex.current_version(user_index_dir(user_id))
+    if version is None:
+        return None
+    cached = _loaded.get(user_id)
+    if cached and cached[0] == version:
+        return cached[1]
+    index = LocalVectorIndex.load(user_index_dir(user_id), version=version)
+    _loaded[user_id] = (version, index)
+    return index
+
+
+# When each user's index was last compared with their article count
+_checked: dict[str, float] = {}
+
+
+def is_stale(
+    index: LocalVectorIndex,
+    collection: Any,
+    user_id: str,
+    *,
+    max_age: float = LOCAL_INDEX_MAX_AGE_SECONDS,
+    check_interval: float = LOCAL_INDEX_CHECK_SECONDS,
+) -> bool:
+    """Return whether a user's index is too old or no longer covers their articles.
+
+    The article count is compared at most once every `check_interval` seconds.
+    """
+    now = time.time()
+    if now - index.built_at > max_age:
+        return True
+    if now - _checked.get(user_id, 0.0) < check_interval:
+        return False
+    _checked[user_id] = now
+    return collection.count_documents(_user_articles_filter(user_id)) != len(index)
+
+
+def get_user_index(
+    collection: Any,
+    user_id: str,
+    *,
+    rebuild: bool = False,
+    index_type: IndexType = "flat",
+    nlist: Optional[int] = None,
+    nprobe: int = 8,
+) -> LocalVectorIndex:
+    """Return a user's index, building it when missing, stale or `rebuild` is set.
+
+    This blocks on disk and database access, so call it from a worker thread.
+    """
+    index = None if rebuild else load_user_index(user_id)
+    if index is None or is_stale(index, collection, user_id):
+        index = build_user_index(
+            collection, user_id, index_type=index_type, nlist=nlist, nprobe=nprobe
+        )
+        _checked[user_id] = time.time()
+    return index
+
+
+class LocalRetriever:
+    """Retriever over a `LocalVectorIndex`, matching the interface of the retrieve node.
+
+    Either pass a ready `index`, or a `load_index` callable that is run once in a
+    worker thread on first use, so loading or building never blocks the event loop.
+    """
+
+    def __init__(
+        self,
+        index: Optional[LocalVectorIndex],
+        embedding_model: Embeddings,
+        search_kwargs: Optional[dict] = None,
+        *,
+        load_index: Optional[Callable[[], LocalVectorIndex]] = None,
+    ):
+        self.index = index
+        self.embedding_model = embedding_model
+        self.search_kwargs = search_kwargs or {}
+        self.load_index = load_index
+        self._load_lock = asyncio.Lock()
+
+    async def _get_index(self) -> LocalVectorIndex:
+        if self.index is None:
+            async with self._load_lock:
+                if self.index is None:
+                    self.index = await asyncio.to_thread(self.load_index)
+        return self.index
+
+    async def ainvoke(self, query: str, config: RunnableConfig) -> list[Document]:
+        """Embed the query and return the nearest documents from the local index."""
+        index, embedding = await asyncio.gather(
+            self._get_index(), self.embedding_model.aembed_query(query)
+        )
+        hits = await asyncio.to_thread(
+            index.search,
+            embedding,
+            self.search_kwargs.get("k", 4),
+            nprobe=self.search_kwargs.get("nprobe"),
+        )
+        return [
+            Document(
+                page_content=index.texts[i],
+                metadata={"id": index.ids[i], "score": score},
+            )
+            for i, score in hits
+            if index.texts[i]
+        ]
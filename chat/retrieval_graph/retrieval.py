@@ -1,16 +1,17 @@
 """Manage the configuration of various retrievers.
 
 This module provides functionality to create and manage retrievers for different
-vector store backends, specifically Elasticsearch, Pinecone, and MongoDB.
+vector store backends, specifically Elasticsearch, Pinecone, MongoDB, and a
+local in-process NumPy index.
 
 The retrievers support filtering results by user_id to ensure data isolation between users.
 """
-from config.config_loader import MONGO_URI
+from config.config_loader import EMBEDDING_DIMENSIONS, MONGO_URI
 import os
 import logging
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Generator, AsyncGenerator
+from typing import TYPE_CHECKING, Generator, AsyncGenerator, Optional
 
 from langchain_core.embeddings import Embeddings
 from langchain_core.runnables import RunnableConfig
@@ -21,21 +22,39 @@ from chat.retrieval_graph.custom_retriever import CustomMongoDBRetriever
 from dotenv import load_dotenv
 load_dotenv()
 
+if TYPE_CHECKING:
+    from chat.retrieval_graph.local_index import LocalRetriever
+
 ## Encoder constructors
 
 
-def make_text_encoder(model: str) -> Embeddings:
-    """Connect to the configured text encoder."""
+def make_text_encoder(model: str, dimensions: Optional[int] = None) -> Embeddings:
+    """Connect to the configured text encoder.
+
+    For OpenAI text-embedding-3 models, `dimensions` (defaulting to
+    EMBEDDING_DIMENSIONS) truncates the embedding so queries match the vectors
+    stored at ingestion.
+    """
     provider, model = model.split("/", maxsplit=1)
     match provider:
         case "openai":
             from langchain_openai import OpenAIEmbeddings
 
+            if model.startswith("text-embedding-3"):
+                return OpenAIEmbeddings(
+                    model=model, dimensions=dimensions or EMBEDDING_DIMENSIONS
+                )
             return OpenAIEmbeddings(model=model)
         case "cohere":
             from langchain_cohere import CohereEmbeddings
 
             return CohereEmbeddings(model=model)  # type: ignore
+        case "fake":
+            # Deterministic, network-free embeddings for tests and benchmarks,
+            # e.g. "fake/1536"
+            from langchain_core.embeddings import DeterministicFakeEmbedding
+
+            return DeterministicFakeEmbedding(size=int(model))
         case _:
             raise ValueError(f"Unsupported embedding provider: {provider}")
 
@@ -118,7 +137,8 @@ def make_mongodb_retriever(
         retriever = CustomMongoDBRetriever(
             mongo_uri=MONGO_URI,
             embedding_model=embedding_model,
-            search_kwargs=configuration.search_kwargs
+            search_kwargs=configuration.search_kwargs,
+            search_mode=configuration.search_mode,
         )
         yield retriever
     finally:
@@ -126,13 +146,43 @@ def make_mongodb_retriever(
         pass
 
 
+@contextmanager
+def make_local_retriever(
+    configuration: IndexConfiguration,
+    embedding_model: Embeddings
+) -> Generator["LocalRetriever", None, None]:
+    """Serve retrieval from the user's in-process index.
+
+    The index is loaded, or built when missing or stale, in a worker thread on the
+    first query rather than here, so it never blocks the event loop.
+    """
+    from functools import partial
+
+    from chat.retrieval_graph.local_index import LocalRetriever, get_user_index
+    from database.db_setup import get_mongo_client
+
+    search_kwargs = configuration.search_kwargs
+    load_index = partial(
+        get_user_index,
+        get_mongo_client()["news_articles"],
+        configuration.user_id,
+        rebuild=bool(search_kwargs.get("rebuild")),
+        index_type=search_kwargs.get("index_type", "flat"),
+        nlist=search_kwargs.get("nlist"),
+        nprobe=search_kwargs.get("nprobe", 8),
+    )
+    yield LocalRetriever(None, embedding_model, search_kwargs, load_index=load_index)
+
+
 @contextmanager
 def make_retriever(
     config: RunnableConfig,
 ) -> Generator[VectorStoreRetriever, None, None]:
     """Create a retriever for the agent, based on the current configuration."""
     configuration = IndexConfiguration.from_runnable_config(config)
-    embedding_model = make_text_encoder(configuration.embedding_model)
+    embedding_model = make_text_encoder(
+        configuration.embedding_model, configuration.embedding_dimensions
+    )
     user_id = configuration.user_id
     if not user_id:
         raise ValueError("Please provide a valid user_id in the configuration.")
@@ -149,6 +199,10 @@ def make_retriever(
             with make_mongodb_retriever(configuration, embedding_model) as retriever:
                 yield retriever
 
+        case "local":
+            with make_local_retriever(configuration, embedding_model) as retriever:
+                yield retriever
+
         case _:
             raise ValueError(
                 "Unrecognized retriever_provider in configuration. "
@@ -6,9 +6,10 @@ and other common operations in project.
 Functions:
     get_message_text: Extract text content from various message formats.
     format_docs: Convert documents to an xml-formatted string.
+    reciprocal_rank_fusion: Merge several ranked document lists into one.
 """
 
-from typing import Optional
+from typing import Optional, Sequence
 
 from langchain.chat_models import init_chat_model
 from langchain_core.documents import Document
@@ -97,6 +98,57 @@ def format_docs(docs: Optional[list[Document]]) -> str:
 </documents>"""
 
 
+def _doc_key(doc: Document) -> str:
+    """Return a key identifying a document across result lists.
+
+    Prefers the document id stored in the metadata and falls back to the page content.
+    """
+    doc_id = (doc.metadata or {}).get("id")
+    return str(doc_id) if doc_id is not None else doc.page_content
+
+
+def reciprocal_rank_fusion(
+    results: Sequence[Sequence[Document]], *, k: int = 60, limit: Optional[int] = None
+) -> list[Document]:
+    """Merge several ranked lists of documents using reciprocal-rank fusion.
+
+    Each document receives a score of ``sum(1 / (k + rank))`` over every list it
+    appears in (ranks start at 1). Duplicates are collapsed, keeping the first
+    instance seen, and the fused score is stored in ``metadata["rrf_score"]``.
+
+    Args:
+        results (Sequence[Sequence[Document]]): Ranked result lists, best first.
+        k (int): Rank offset that dampens the influence of top positions.
+        limit (Optional[int]): Maximum number of documents to return.
+
+    Returns:
+        list[Document]: The deduplicated documents, ordered by fused score.
+
+    Examples:
+        >>> a, b, c = (Document(page_content=t) for t in "abc")
+        >>> [d.page_content for d in reciprocal_rank_fusion([[a, b], [b, c]])]
+        ['b', 'a', 'c']
+    """
+    scores: dict[str, float] = {}
+    docs: dict[str, Document] = {}
+    for ranked in results:
+        for rank, doc in enumerate(ranked, start=1):
+            key = _doc_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            docs.setdefault(key, doc)
+
+    ordered = sorted(scores, key=scores.__getitem__, reverse=True)
+    if limit is not None:
+        ordered = ordered[:limit]
+    return [
+        Document(
+            page_content=docs[key].page_content,
+            metadata={**docs[key].metadata, "rrf_score": scores[key]},
+        )
+        for key in ordered
+    ]
+
+
 def load_chat_model(fully_specified_name: str) -> BaseChatModel:
     """Load a chat model from a fully specified name.
 
@@ -20,10 +20,75 @@ NEWSAPI_KEY = os.getenv("NEWSAPI_KEY")
 
 # MongoDB URI
 MONGO_URI = os.getenv("MONGO_URI")
+MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "content_db")
+
+# MongoDB connection pool, shared by everything in a process (one sync and one async client)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "60000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "10000"))
+# Unset means no socket timeout, so long aggregations are not cut off
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS")) if os.getenv("MONGO_SOCKET_TIMEOUT_MS") else None
+# e.g. "primary", "primaryPreferred", "secondaryPreferred", "nearest"
+MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "primary")
 
 # OpenAI
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+# Embedding dimensionality for text-embedding-3 models (Matryoshka truncation, e.g. 256 or 512)
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "1536"))
+
+# Embedding storage for news_articles: "float", "int8" or "binary"
+EMBEDDING_STORAGE = os.getenv("EMBEDDING_STORAGE", "float")
+# Atlas automatic quantization for float embeddings: "scalar", "binary" or unset
+EMBEDDING_INDEX_QUANTIZATION = os.getenv("EMBEDDING_INDEX_QUANTIZATION") or None
+
+# Digest pre-warming: ingest and summarize this many minutes before each notification time,
+# spread over a window so popular times don't all start at once
+DIGEST_PREWARM_LEAD_MINUTES = int(os.getenv("DIGEST_PREWARM_LEAD_MINUTES", "30"))
+DIGEST_PREWARM_SPREAD_MINUTES = int(os.getenv("DIGEST_PREWARM_SPREAD_MINUTES", "20"))
+DIGEST_PREWARM_CONCURRENCY = int(os.getenv("DIGEST_PREWARM_CONCURRENCY", "4"))
+
+# Notification dispatch: users due in the same minute are sent in batches of this size (one FCM
+# send_each call holds at most 500), with up to NOTIFICATION_DISPATCH_CONCURRENCY batches in flight
+NOTIFICATION_DISPATCH_BATCH_SIZE = int(os.getenv("NOTIFICATION_DISPATCH_BATCH_SIZE", "500"))
+NOTIFICATION_DISPATCH_CONCURRENCY = int(os.getenv("NOTIFICATION_DISPATCH_CONCURRENCY", "4"))
+# Spread each user's sends over this many minutes after their chosen time (0 sends exactly on time)
+NOTIFICATION_JITTER_MINUTES = int(os.getenv("NOTIFICATION_JITTER_MINUTES", "0"))
+
+# Distributed scheduling: users are split into shards that workers hold through leases.
+# Set SCHEDULER_LEASE_BACKEND to "mongo" or "redis" when running more than one worker;
+# left empty, a single worker owns every shard.
+NOTIFICATION_SHARDS = int(os.getenv("NOTIFICATION_SHARDS", "16"))
+SCHEDULER_LEASE_BACKEND = os.getenv("SCHEDULER_LEASE_BACKEND", "")
+SCHEDULER_LEASE_TTL_SECONDS = float(os.getenv("SCHEDULER_LEASE_TTL_SECONDS", "15"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Authenticated users are cached in-process for this long; set USER_CACHE_BACKEND=redis
+# to also share them between workers through REDIS_URL
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_BACKEND = os.getenv("USER_CACHE_BACKEND", "")
+
+# Password hashing: bcrypt work factor, threads doing bcrypt, and how many requests may wait for one
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "100"))
+
+# Serialized summaries are cached in-process until evicted; with several workers, set
+# SUMMARY_READ_CACHE_BACKEND=redis to broadcast invalidations between them through REDIS_URL
+SUMMARY_READ_CACHE_BACKEND = os.getenv("SUMMARY_READ_CACHE_BACKEND", "")
+
+# After a restart or failover, notifications missed within this many minutes are still sent
+NOTIFICATION_CATCHUP_MINUTES = int(os.getenv("NOTIFICATION_CATCHUP_MINUTES", "15"))
+
+# Optional full re-plan of every user's schedule as a crontab expression (e.g. "0 3 * * *");
+# off by default since the preferences change stream keeps schedules up to date
+SCHEDULE_RECONCILE_CRON = os.getenv("SCHEDULE_RECONCILE_CRON", "")
+
+# How often to poll user_preferences for changes when change streams are unavailable (no replica set)
+PREFERENCES_POLL_SECONDS = float(os.getenv("PREFERENCES_POLL_SECONDS", "30"))
+
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
 BING_API_KEY = os.getenv("BING_API_KEY")
 
@@ -0,0 +1,91 @@
+import argparse
+import math
+
+from pymongo import UpdateOne
+
+from config.config_loader import EMBEDDING_DIMENSIONS, EMBEDDING_STORAGE
+from database.db_setup import get_mongo_client
+from database.embedding_codec import FULL_PRECISION_FIELD, embedding_fields, full_precision_embedding, vector_index_field
+
+
+def truncate_embedding(vector, dimensions):
+    """
+    Matryoshka truncation: keep the first `dimensions` components and re-normalize.
+    text-embedding-3 models are trained so that this prefix is itself a usable embedding.
+    """
+    if len(vector) < dimensions:
+        raise ValueError(f"Cannot truncate a {len(vector)}-dimension embedding to {dimensions} dimensions")
+    prefix = vector[:dimensions]
+    norm = math.sqrt(sum(x * x for x in prefix)) or 1.0
+    return [x / norm for x in prefix]
+
+
+def migrate_embeddings(dimensions=EMBEDDING_DIMENSIONS, mode="truncate", storage=EMBEDDING_STORAGE, batch_size=500):
+    """
+    Rewrite news_articles embeddings at a new dimensionality.
+
+    mode="truncate" derives the new vector from the stored one without any API calls,
+    which only works when shrinking. mode="reembed" calls the embedding API again for
+    each snippet. Articles already at the target dimensionality are skipped, so the
+    migration can be interrupted and resumed.
+    """
+    from data_ingestion.newsapi_ingestion import get_embedding
+
+    db = get_mongo_client()
+    collection = db["news_articles"]
+    cursor = collection.find(
+        {"embedding": {"$exists": True}, "embedding_dimensions": {"$ne": dimensions}},
+        {"snippet": 1, "embedding": 1, FULL_PRECISION_FIELD: 1}
+    ).batch_size(batch_size)
+
+    migrated = 0
+    operations = []
+    for doc in cursor:
+        try:
+            if mode == "reembed":
+                vector = get_embedding(doc.get("snippet") or "", dimensions=dimensions)
+            else:
+                vector = truncate_embedding(full_precision_embedding(doc), dimensions)
+        except Exception as e:
+            print(f"Skipping article {doc['_id']}: {e}")
+            continue
+
+        fields = embedding_fields(vector, storage)
+        update = {"$set": {**fields, "embedding_dimensions": dimensions}}
+        if FULL_PRECISION_FIELD not in fields:
+            update["$unset"] = {FULL_PRECISION_FIELD: ""}
+        operations.append(UpdateOne({"_id": doc["_id"]}, update))
+
+        if len(operations) >= batch_size:
+            collection.bulk_write(operations, ordered=False)
+            migrated += len(operations)
+            operations = []
+            print(f"Migrated {migrated} articles...")
+
+    if operations:
+        collection.bulk_write(operations, ordered=False)
+        migrated += len(operations)
+
+    print(f"Migrated {migrated} articles to {dimensions} dimensions ({storage} storage).")
+    return migrated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate news_articles embeddings to a new dimensionality.")
+    parser.add_argument("--dimensions", type=int, default=EMBEDDING_DIMENSIONS)
+    parser.add_argument("--mode", choices=["truncate", "reembed"], default="truncate")
+    parser.add_argument("--storage", choices=["float", "int8", "binary"], default=EMBEDDING_STORAGE)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--update-index", action="store_true",
+                        help="Update vector_index to the new numDimensions afterwards.")
+    args = parser.parse_args()
+
+    migrate_embeddings(args.dimensions, args.mode, args.storage, args.batch_size)
+
+    if args.update_index:
+        # Atlas rebuilds the index in the background and keeps serving the old one until it is ready
+        get_mongo_client()["news_articles"].update_search_index(
+            "vector_index",
+            {"fields": [vector_index_field(args.dimensions, storage=args.storage)]}
+        )
+        print("Vector index update submitted.")
@@ -11,7 +11,8 @@ DEFAULT_MARKET = 'en-US'
 
 import os
 from openai import OpenAI
-from config.config_loader import OPENAI_API_KEY
+from config.config_loader import OPENAI_API_KEY, EMBEDDING_DIMENSIONS
+from database.embedding_codec import embedding_fields
 
 # Specify your OpenAI API key and embedding model
 
@@ -19,10 +20,10 @@ model = "text-embedding-3-small"
 openai_client = OpenAI(api_key=OPENAI_API_KEY)
 
 # Define a function to generate embeddings
-def get_embedding(text):
-   """Generates vector embeddings for the given text."""
+def get_embedding(text, dimensions=EMBEDDING_DIMENSIONS):
+   """Generates vector embeddings for the given text, truncated to `dimensions`."""
 
-   embedding = openai_client.embeddings.create(input = [text], model=model).data[0].embedding
+   embedding = openai_client.embeddings.create(input = [text], model=model, dimensions=dimensions).data[0].embedding
    return embedding
 
 def fetch_news(query, page_size=10):
@@ -102,7 +103,8 @@ def save_news_to_db(query, user_id):
             # Add user_id, timestamp, and embedding
             article["user_id"] = user_id
             article["saved_at"] = time.time()
-            article["embedding"] = get_embedding(article["snippet"])
+            article.update(embedding_fields(get_embedding(article["snippet"])))
+            article["embedding_dimensions"] = EMBEDDING_DIMENSIONS
             collection.insert_one(article)
             print(f"Saved article '{article['title']}' with embedding.")
         except Exception as e:
@@ -1,14 +1,13 @@
 from pymongo.operations import SearchIndexModel
-from pymongo import MongoClient
+from config.config_loader import EMBEDDING_DIMENSIONS, EMBEDDING_STORAGE, EMBEDDING_INDEX_QUANTIZATION
+from database.db_setup import get_mongo_client
+from database.embedding_codec import vector_index_field
 
-def get_mongo_client():
-    client = MongoClient("")
-    return client["content_db"]
-
-def setup_vector_index():
+def setup_vector_index(storage=EMBEDDING_STORAGE, quantization=EMBEDDING_INDEX_QUANTIZATION, dimensions=EMBEDDING_DIMENSIONS):
     """
     Creates a vector search index for news articles.
     Only needs to be run once during initial setup or if the index needs to be rebuilt.
+    The index definition must match how embeddings are stored (see database.embedding_codec).
     """
     try:
         db = get_mongo_client()
@@ -25,12 +24,11 @@ def setup_vector_index():
         search_index_model = SearchIndexModel(
             definition={
                 "fields": [
-                    {
-                        "type": "vector",
-                        "path": "embedding",
-                        "numDimensions": 1536,  # text-embedding-3-small dimension
-                        "similarity": "cosine"  # or "dotProduct" based on your preference
-                    }
+                    vector_index_field(
+                        dimensions,  # must match EMBEDDING_DIMENSIONS used at ingestion
+                        storage=storage,
+                        quantization=quantization
+                    )
                 ]
             },
             name="vector_index",
@@ -44,6 +42,41 @@ def setup_vector_index():
     except Exception as e:
         print(f"Error creating vector index: {e}")
 
+def setup_text_index():
+    """
+    Creates an Atlas Search index over article titles and snippets.
+    Used by the hybrid retrieval mode to match named entities and tickers
+    that vector search alone tends to miss.
+    """
+    try:
+        db = get_mongo_client()
+        collection = db["news_articles"]
+
+        for index in collection.list_search_indexes():
+            if index.get("name") == "text_index":
+                print("Text index already exists.")
+                return
+
+        search_index_model = SearchIndexModel(
+            definition={
+                "mappings": {
+                    "dynamic": False,
+                    "fields": {
+                        "title": {"type": "string", "analyzer": "lucene.standard"},
+                        "snippet": {"type": "string", "analyzer": "lucene.standard"}
+                    }
+                }
+            },
+            name="text_index",
+            type="search"
+        )
+
+        collection.create_search_index(model=search_index_model)
+        print("Text index created successfully.")
+
+    except Exception as e:
+        print(f"Error creating text index: {e}")
+
 def verify_or_rebuild_index():
     """
     Utility function to verify index health and rebuild if necessary.
@@ -83,4 +116,5 @@ def verify_or_rebuild_index():
 
 if __name__ == "__main__":
     # Run this script once during initial setup
-    setup_vector_index()
\ No newline at end of file
+    setup_vector_index()
+    setup_text_index()
\ No newline at end of file
@@ -0,0 +1,18 @@
+from motor.motor_asyncio import AsyncIOMotorClient
+from config.config_loader import MONGO_URI, MONGO_DB_NAME
+from database.db_setup import mongo_client_options
+
+_client = None
+
+def get_async_mongo_client():
+    """Database on the process-wide async client, created on first use so it binds to the running event loop"""
+    global _client
+    if _client is None:
+        _client = AsyncIOMotorClient(MONGO_URI, **mongo_client_options())
+    return _client[MONGO_DB_NAME]
+
+def close_async_mongo_client():
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
@@ -1,10 +1,48 @@
 from pymongo import MongoClient
-import os
-from config.config_loader import MONGO_URI
+import threading
+from config.config_loader import (
+    MONGO_URI,
+    MONGO_DB_NAME,
+    MONGO_MAX_POOL_SIZE,
+    MONGO_MIN_POOL_SIZE,
+    MONGO_MAX_IDLE_TIME_MS,
+    MONGO_CONNECT_TIMEOUT_MS,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    MONGO_SOCKET_TIMEOUT_MS,
+    MONGO_READ_PREFERENCE
+)
 
-def get_mongo_client():
-    client = MongoClient(MONGO_URI)
-    return client["content_db"]
+_client = None
+_lock = threading.Lock()
+
+def mongo_client_options() -> dict:
+    """Pool, timeout and read preference settings shared by the sync and async clients"""
+    return {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS,
+        "readPreference": MONGO_READ_PREFERENCE,
+    }
 
-mongo_client = get_mongo_client()
+def get_mongo_connection() -> MongoClient:
+    """The process-wide MongoClient, created on first use"""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = MongoClient(MONGO_URI, **mongo_client_options())
+    return _client
+
+def get_mongo_client():
+    """The application database on the shared client; calling this does not open new connections"""
+    return get_mongo_connection()[MONGO_DB_NAME]
 
+def close_mongo_client():
+    global _client
+    with _lock:
+        if _client is not None:
+            _client.close()
+            _client = None
@@ -0,0 +1,112 @@
+from typing import Dict, List, Optional, Sequence
+
+from bson.binary import Binary, BinaryVectorDtype
+
+from config.config_loader import EMBEDDING_STORAGE
+
+# Supported storage formats for news_articles embeddings:
+#   float  - BSON array of doubles (8 bytes per dimension, the original format)
+#   int8   - BSON binary int8 vector, scalar-quantized per vector (1 byte per dimension)
+#   binary - BSON binary packed-bit vector holding the sign of each dimension (1 bit per dimension)
+STORAGE_FORMATS = ("float", "int8", "binary")
+
+# Field holding the full-precision float32 copy used to rescore quantized results
+FULL_PRECISION_FIELD = "embedding_full"
+
+
+def quantize_int8(vector: Sequence[float]) -> List[int]:
+    """
+    Scale a vector into [-127, 127] using its own largest component.
+    Per-vector scaling changes the magnitude but not the direction, so cosine
+    similarity between quantized vectors still approximates the original.
+    """
+    peak = max((abs(x) for x in vector), default=0.0) or 1.0
+    return [max(-127, min(127, round(x * 127 / peak))) for x in vector]
+
+
+def pack_bits(vector: Sequence[float]) -> List[int]:
+    """
+    Keep only the sign of each dimension, packed eight dimensions per byte with
+    the first dimension in the most significant bit.
+    """
+    packed = []
+    for start in range(0, len(vector), 8):
+        byte = 0
+        for offset, x in enumerate(vector[start:start + 8]):
+            if x > 0:
+                byte |= 0x80 >> offset
+        packed.append(byte)
+    return packed
+
+
+def encode_embedding(vector: Sequence[float], storage: str = EMBEDDING_STORAGE):
+    """Encode a float embedding in the configured storage format."""
+    if storage == "float":
+        return list(vector)
+    if storage == "int8":
+        return Binary.from_vector(quantize_int8(vector), BinaryVectorDtype.INT8)
+    if storage == "binary":
+        padding = (-len(vector)) % 8
+        return Binary.from_vector(pack_bits(vector), BinaryVectorDtype.PACKED_BIT, padding)
+    raise ValueError(f"Unsupported embedding storage: {storage}. Expected one of {STORAGE_FORMATS}")
+
+
+def decode_embedding(value) -> List[float]:
+    """
+    Decode a stored embedding back into a list of floats.
+    Quantized vectors decode to their quantized values (bits become +1/-1),
+    which is enough for cosine ranking but not for exact rescoring.
+    """
+    if not isinstance(value, Binary):
+        return list(value)
+    vector = value.as_vector()
+    if vector.dtype == BinaryVectorDtype.PACKED_BIT:
+        bits = []
+        for byte in vector.data:
+            bits.extend(1.0 if byte & (0x80 >> i) else -1.0 for i in range(8))
+        return bits[:len(bits) - vector.padding] if vector.padding else bits
+    return [float(x) for x in vector.data]
+
+
+def embedding_fields(
+    vector: Sequence[float],
+    storage: str = EMBEDDING_STORAGE,
+    keep_full_precision: bool = True,
+) -> Dict:
+    """
+    Build the embedding fields to store on an article.
+    Quantized formats also keep a float32 binary copy (4 bytes per dimension,
+    half the size of a BSON double array) that is not indexed and is only read
+    to rescore the top-k candidates.
+    """
+    fields = {"embedding": encode_embedding(vector, storage)}
+    if storage != "float" and keep_full_precision:
+        fields[FULL_PRECISION_FIELD] = Binary.from_vector(list(vector), BinaryVectorDtype.FLOAT32)
+    return fields
+
+
+def full_precision_embedding(doc: Dict) -> Optional[List[float]]:
+    """Return the best available float embedding stored on a document."""
+    if doc.get(FULL_PRECISION_FIELD) is not None:
+        return decode_embedding(doc[FULL_PRECISION_FIELD])
+    if doc.get("embedding") is not None:
+        return decode_embedding(doc["embedding"])
+    return None
+
+
+def vector_index_field(num_dimensions: int, storage: str = EMBEDDING_STORAGE, quantization: Optional[str] = None) -> Dict:
+    """
+    Build the Atlas vector index field definition matching a storage format.
+    Packed-bit vectors can only be compared with euclidean (Hamming) distance.
+    For float storage, `quantization` ("scalar" or "binary") enables Atlas'
+    automatic quantization of the indexed vectors instead.
+    """
+    field = {
+        "type": "vector",
+        "path": "embedding",
+        "numDimensions": num_dimensions,
+        "similarity": "euclidean" if storage == "binary" else "cosine"
+    }
+    if storage == "float" and quantization:
+        field["quantization"] = quantization
+    return field
@@ -0,0 +1,174 @@
+import base64
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+from database.async_db import get_async_mongo_client
+
+
+def to_object_id(value) -> Optional[ObjectId]:
+    """ObjectId for `value`, or None if it is not a valid id"""
+    if isinstance(value, ObjectId):
+        return value
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        return None
+
+
+def _stringify_ids(doc: Optional[Dict]) -> Optional[Dict]:
+    """Convert the document and owner ObjectIds to strings for JSON responses"""
+    if doc is None:
+        return None
+    doc['_id'] = str(doc['_id'])
+    if isinstance(doc.get('user_id'), dict) and '_id' in doc['user_id']:
+        doc['user_id']['_id'] = str(doc['user_id']['_id'])
+    return doc
+
+
+class Repository:
+    """
+    Async access to one collection. The shared client is resolved on first use,
+    so repositories can be created at import time, before the event loop runs.
+    """
+    collection_name = None
+
+    def __init__(self, db=None):
+        self._db = db
+
+    @property
+    def collection(self):
+        db = self._db if self._db is not None else get_async_mongo_client()
+        return db[self.collection_name]
+
+
+class UserRepository(Repository):
+    collection_name = 'users'
+
+    async def get_by_id(self, user_id) -> Optional[Dict]:
+        object_id = to_object_id(user_id)
+        if object_id is None:
+            return None
+        return await self.collection.find_one({'_id': object_id})
+
+    async def get_by_email(self, email: str) -> Optional[Dict]:
+        return await self.collection.find_one({'email': email})
+
+    async def create(self, user: Dict) -> ObjectId:
+        result = await self.collection.insert_one(user)
+        return result.inserted_id
+
+    async def set_password_hash(self, user_id, password_hash: str):
+        await self.collection.update_one({'_id': to_object_id(user_id)}, {'$set': {'password_hash': password_hash}})
+
+    async def set_fcm_token(self, user_id, fcm_token: str) -> bool:
+        result = await self.collection.update_one(
+            {'_id': to_object_id(user_id)},
+            {'$set': {'fcm_token': fcm_token}}
+        )
+        return result.modified_count > 0
+
+
+class PreferencesRepository(Repository):
+    collection_name = 'user_preferences'
+
+    async def get(self, user_id) -> Optional[Dict]:
+        return _stringify_ids(await self.collection.find_one({'user_id._id': to_object_id(user_id)}))
+
+    async def upsert(self, current_user: Dict, topics: List[str], sources: List[str],
+                     notification_times: List[str], timezone: str = "UTC"):
+        preferences = {
+            "user_id": {
+                "_id": to_object_id(current_user['_id']),
+                "email": current_user['email'],
+                "username": current_user['username'],
+                "created_at": current_user['created_at']
+            },
+            "topics": topics,
+            "sources": sources,
+            "notification_times": notification_times,
+            "timezone": timezone,
+            "updated_at": datetime.utcnow().isoformat(),
+        }
+        await self.collection.update_one(
+            {"user_id._id": to_object_id(current_user['_id'])},
+            {"$set": preferences},
+            upsert=True
+        )
+        return preferences
+
+
+class SummaryRepository(Repository):
+    collection_name = 'article_summaries'
+
+    async def get_by_id(self, summary_id) -> Optional[Dict]:
+        object_id = to_object_id(summary_id)
+        if object_id is None:
+            return None
+        return _stringify_ids(await self.collection.find_one({'_id': object_id}))
+
+    async def get_thread_id(self, summary_id) -> Optional[str]:
+        object_id = to_object_id(summary_id)
+        if object_id is None:
+            return None
+        summary = await self.collection.find_one({'_id': object_id}, {'thread_id': 1})
+        return summary.get('thread_id') if summary else None
+
+    async def set_thread_id(self, summary_id, thread_id: str) -> bool:
+        object_id = to_object_id(summary_id)
+        if object_id is None:
+            return False
+        result = await self.collection.update_one({'_id': object_id}, {'$set': {'thread_id': thread_id}})
+        return result.modified_count > 0
+
+
+class NotificationRepository(Repository):
+    collection_name = 'notifications'
+
+    async def ensure_indexes(self):
+        # Serves the keyset pagination in list_for_user
+        await self.collection.create_index([('user_id', 1), ('timestamp', -1), ('_id', -1)])
+
+    @staticmethod
+    def encode_cursor(notification: Dict) -> str:
+        key = f"{notification['timestamp'].isoformat()}|{notification['_id']}"
+        return base64.urlsafe_b64encode(key.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+        """(timestamp, _id) of the last notification of the previous page; raises ValueError if malformed"""
+        try:
+            timestamp, notification_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+            return datetime.fromisoformat(timestamp), ObjectId(notification_id)
+        except Exception as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+
+    async def list_for_user(self, user_id: str, limit: int = 20, cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """
+        One page of a user's notifications, newest first, and the cursor for the next page (None on the last page).
+        Pages are keyed on (timestamp, _id) so each page costs the same no matter how deep it is.
+        """
+        query = {'user_id': user_id}
+        if cursor:
+            timestamp, notification_id = self.decode_cursor(cursor)
+            query['$or'] = [
+                {'timestamp': {'$lt': timestamp}},
+                {'timestamp': timestamp, '_id': {'$lt': notification_id}}
+            ]
+        results = self.collection.find(
+            query,
+            {'summary_id': 1, 'timestamp': 1}
+        ).sort([('timestamp', -1), ('_id', -1)]).limit(limit + 1)
+        notifications = await results.to_list(length=limit + 1)
+
+        next_cursor = None
+        if len(notifications) > limit:
+            notifications = notifications[:limit]
+            next_cursor = self.encode_cursor(notifications[-1])
+        return [_stringify_ids(notification) for notification in notifications], next_cursor
+
+    async def get_for_user(self, notification_id, user_id: str) -> Optional[Dict]:
+        object_id = to_object_id(notification_id)
+        if object_id is None:
+            return None
+        return await self.collection.find_one({'_id': object_id, 'user_id': user_id})
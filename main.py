@@ -1,14 +1,17 @@
 import os
 import json
 import uuid
-from fastapi import FastAPI, Depends, Body
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, Body, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse, StreamingResponse, Response
 from fastapi.exceptions import HTTPException
+from fastapi.encoders import jsonable_encoder
 from fastapi import Request
-from user_management.auth import signup_user, login_user, get_current_user
-from user_management.preferences import update_user_preferences, get_user_preferences
+from user_management.auth import signup_user, login_user, get_current_user, get_token_claims
+from user_management.user_cache import user_cache
+from user_management.password_hashing import password_hasher
 from user_management.fcm_router import fcm_router
 from user_management.models import UserCreate, UserLogin, PreferencesUpdate
 from data_ingestion.newsapi_ingestion import save_news_to_db
@@ -16,13 +19,15 @@ from data_ingestion.reddit_ingestion import save_posts_to_db
 from data_ingestion.twitter_ingestion import save_tweets_to_db
 from summarizer.notification_scheduler import NotificationScheduler
 from summarizer.summ import UserContentSummarizer 
-from summarizer.summary_retriever import get_summary_by_id
+from summarizer.summary_read_cache import make_summary_read_cache, etag_matches
 from notifications.notifications_retriever import get_summary_by_notification, get_user_notifications
 from chat_s.s_chat import RAGChatService
 from chat.retrieval_graph import graph
 from typing import List, Optional
-from bson import ObjectId
-from database.db_setup import get_mongo_client
+from database.async_db import get_async_mongo_client, close_async_mongo_client
+from database.db_setup import get_mongo_client, close_mongo_client
+from database.repositories import PreferencesRepository, SummaryRepository, NotificationRepository
+import asyncio
 from config.config_loader import OPENAI_API_KEY, TAVILY_API_KEY
 from pydantic import BaseModel
 import logging
@@ -35,10 +40,28 @@ class QuestionRequest(BaseModel):
 class QuestionResponse(BaseModel):
     response: str
 
-db = get_mongo_client()
-
-notification_scheduler = NotificationScheduler()
-app = FastAPI()
+preferences_repository = PreferencesRepository()
+summary_repository = SummaryRepository()
+notification_repository = NotificationRepository()
+summary_read_cache = make_summary_read_cache()
+
+summarizer = UserContentSummarizer()
+notification_scheduler = NotificationScheduler(summarizer=summarizer)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Connect the shared pools up front so the first requests don't pay for server selection
+    await asyncio.to_thread(get_mongo_client().command, 'ping')
+    await get_async_mongo_client().command('ping')
+    await notification_repository.ensure_indexes()
+    invalidations = asyncio.create_task(summary_read_cache.listen())
+    yield
+    invalidations.cancel()
+    notification_scheduler.shutdown()
+    close_async_mongo_client()
+    close_mongo_client()
+
+app = FastAPI(lifespan=lifespan)
 app.include_router(fcm_router, prefix="/api")
 app.add_middleware(
     CORSMiddleware,
@@ -46,6 +69,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 # app.mount("/static", StaticFiles(directory="web"), name="static")
 
@@ -61,54 +85,73 @@ app.add_middleware(
 
 @app.post("/signup/")
 async def signup(user: UserCreate):
-    return signup_user(email=user.email, username=user.username, password=user.password)
+    return await signup_user(email=user.email, username=user.username, password=user.password)
 
 @app.post("/login/")
 async def login(user: UserLogin):
-    token = login_user(email=user.email, password=user.password)
+    token = await login_user(email=user.email, password=user.password)
     return {"access_token": token, "token_type": "bearer"}
 
+@app.get("/metrics/password_hashing")
+async def password_hashing_metrics():
+    """Queue depth and in-flight count of the bcrypt pool, for monitoring login load."""
+    return password_hasher.stats()
+
 @app.put("/preferences/")
 async def preferences(preferences: PreferencesUpdate, current_user: dict = Depends(get_current_user)):
-    return update_user_preferences(
+    await preferences_repository.upsert(
         current_user=current_user,
         topics=preferences.topics,
         sources=preferences.sources,
-        notification_times=preferences.notification_times
+        notification_times=preferences.notification_times,
+        timezone=preferences.timezone
     )
+    await notification_scheduler.schedule_user_notifications({
+        "user_id": {"_id": current_user['_id']},
+        "notification_times": preferences.notification_times,
+        "timezone": preferences.timezone
+    })
+    await user_cache.invalidate(current_user['_id'])
+    return {"message": "Preferences updated successfully!"}
 
 @app.get("/get_preferences/")
-async def get_preferences(current_user: dict = Depends(get_current_user)):
-    return get_user_preferences(current_user)
+async def get_preferences(current_user: dict = Depends(get_token_claims)):
+    return await get_preferences_or_404(current_user)
+
+async def get_preferences_or_404(current_user: dict):
+    preferences = await preferences_repository.get(current_user['_id'])
+    if not preferences:
+        raise HTTPException(status_code=404, detail="User preferences not found.")
+    return preferences
 
 @app.get("/ingest/news/")
 async def ingest_news(user_id: str = Depends(get_current_user)):
-    preferences = get_user_preferences(user_id)
+    preferences = await get_preferences_or_404(user_id)
     topics = preferences.get("topics", [])
     for topic in topics:
-        save_news_to_db(query=topic, user_id=user_id)
+        await asyncio.to_thread(save_news_to_db, query=topic, user_id=user_id)
     return {"message": "News ingestion completed based on user preferences."}
 
 @app.get("/ingest/reddit/")
 async def ingest_reddit(user_id: str = Depends(get_current_user)):
-    preferences = get_user_preferences(user_id)
+    preferences = await get_preferences_or_404(user_id)
     sources = preferences.get("sources", [])
     for subreddit in sources:
-        save_posts_to_db(subreddit_name=subreddit, user_id=user_id)
+        await asyncio.to_thread(save_posts_to_db, subreddit_name=subreddit, user_id=user_id)
     return {"message": "Reddit ingestion completed based on user preferences."}
 
 @app.get("/ingest/twitter/")
 async def ingest_twitter(user_id: str = Depends(get_current_user)):
-    preferences = get_user_preferences(user_id)
+    preferences = await get_preferences_or_404(user_id)
     topics = preferences.get("topics", [])
     for topic in topics:
-        save_tweets_to_db(query=topic, user_id=user_id)
+        await asyncio.to_thread(save_tweets_to_db, query=topic, user_id=user_id)
     return {"message": "Twitter ingestion completed based on user preferences."}
 
 @app.get("/summarize/recent_articles/")
-async def summarize_recent_articles(current_user: dict = Depends(get_current_user)):
-    summarizer = UserContentSummarizer()
-    results = summarizer.summarize_recent_user_articles(user_id=str(current_user['_id']))
+async def summarize_recent_articles(incremental: bool = False, limit: int = Query(10, ge=1, le=200),
+                                    current_user: dict = Depends(get_current_user)):
+    results = await summarizer.asummarize_recent_user_articles(user_id=str(current_user['_id']), limit=limit, incremental=incremental)
     # try:
     #     # This is a manual method to send notifications immediately
     #     await notification_scheduler._send_notification(str(current_user['_id']))
@@ -117,18 +160,45 @@ async def summarize_recent_articles(current_user: dict = Depends(get_current_use
     
     return {"message": f"Summarized {len(results)} articles", "summaries": results}
 
+@app.get("/summarize/recent_articles/stream")
+async def stream_recent_articles(limit: int = Query(10, ge=1, le=200), current_user: dict = Depends(get_current_user)):
+    """Stream per-article summaries and then the detailed summary as newline-delimited JSON events."""
+    async def events():
+        async for event in summarizer.astream_recent_user_articles(user_id=str(current_user['_id']), limit=limit):
+            yield json.dumps(event, default=str) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
 @app.get("/summaries/{summary_id}")
-async def get_summary(summary_id: str, current_user: dict = Depends(get_current_user)):
-    summary = get_summary_by_id(summary_id)
+async def get_summary(summary_id: str, request: Request, current_user: dict = Depends(get_token_claims)):
+    entry = await cached_summary(summary_id)
     
-    if not summary:
+    if not entry:
         raise HTTPException(status_code=404, detail="Summary not found")
     
     # Optional: Add additional authorization check
-    if str(current_user['_id']) != summary['user_id']['_id']:
+    owner_id, body, etag = entry
+    if str(current_user['_id']) != owner_id:
         raise HTTPException(status_code=403, detail="Unauthorized to access this summary")
     
-    return summary
+    return summary_response(request, body, etag)
+
+async def cached_summary(summary_id: str):
+    """(owner id, JSON body, ETag) of a summary, from the read cache or the database"""
+    entry = summary_read_cache.get(summary_id)
+    if entry is None:
+        summary = await summary_repository.get_by_id(summary_id)
+        if summary:
+            entry = summary_read_cache.put(summary)
+    return entry
+
+def summary_response(request: Request, body: bytes, etag: str) -> Response:
+    """The summary body, or 304 when the client already has this version"""
+    # Clients may keep the body but must revalidate, since a chat thread can be attached later
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @app.post("/test_notifications/")
 async def test_notifications(current_user: dict = Depends(get_current_user)):
@@ -136,8 +206,10 @@ async def test_notifications(current_user: dict = Depends(get_current_user)):
         # Directly use the _send_notification method for testing
         await notification_scheduler._send_notification(str(current_user['_id']))
         return {"message": "Test notification sent successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
-        return {"error": f"Failed to send test notification: {str(e)}"}
+        raise HTTPException(status_code=500, detail=f"Failed to send test notification: {str(e)}")
     
 # @app.post("/api/chat/{summary_id}")
 # async def chat_endpoint(request:Request, summary_id: str, current_user: dict = Depends(get_current_user)):
@@ -192,10 +264,9 @@ async def ask_question(request: Request, summary_id:str, current_user: dict = De
     user_id = str(current_user['_id'])
     try:
         question = await request.json()
-        summary = db.article_summaries.find_one({"_id": ObjectId(summary_id)})
-        if not summary or 'thread_id' not in summary:
+        thread_id = await summary_repository.get_thread_id(summary_id)
+        if not thread_id:
             raise HTTPException(status_code=404, detail="Summary or thread not found")
-        thread_id = summary['thread_id']
         
         response = await graph.process_stream(question['question'], user_id=user_id, thread_id=thread_id)
         return {"response": response}
@@ -207,12 +278,10 @@ async def initialize_thread(summary_id: str, current_user: dict = Depends(get_cu
     thread_id = str(uuid.uuid4())
     
     # Update the summary document with the thread_id
-    result = await db.article_summaries.update_one(
-        {"_id": ObjectId(summary_id)},
-        {"$set": {"thread_id": thread_id}}
-    )
+    updated = await summary_repository.set_thread_id(summary_id, thread_id)
+    await summary_read_cache.invalidate(summary_id)
     
-    if result.modified_count == 0:
+    if not updated:
         raise HTTPException(status_code=404, detail="Summary not found")
         
     return {"thread_id": thread_id}
@@ -261,45 +330,52 @@ async def initialize_thread(summary_id: str, current_user: dict = Depends(get_cu
 #         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/user_notifications/")
-async def user_notifications(current_user: dict = Depends(get_current_user)):
-    """Fetch the notification history for the current user."""
+async def user_notifications(limit: int = Query(20, ge=1, le=100), cursor: Optional[str] = None,
+                             current_user: dict = Depends(get_token_claims)):
+    """
+    Fetch one page of the notification history for the current user, newest first.
+    Pass the X-Next-Cursor header of a response as `cursor` to get the following page;
+    the header is absent on the last page.
+    """
     user_id = str(current_user['_id'])  # Convert ObjectId to string
     
-    # Retrieve all notifications for the current user, sorted by timestamp
-    notifications = list(db['notifications'].find(
-        {'user_id': user_id},
-        {'summary_id': 1, 'timestamp': 1}
-    ).sort('timestamp', -1))
-    
-    # Convert ObjectIds to strings
-    for notification in notifications:
-        notification['_id'] = str(notification['_id'])
+    try:
+        notifications, next_cursor = await notification_repository.list_for_user(user_id, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-    print(notifications)
-    
-    return notifications
+    async def body():
+        yield "["
+        for i, notification in enumerate(notifications):
+            yield ("," if i else "") + json.dumps(jsonable_encoder(notification))
+        yield "]"
+
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    return StreamingResponse(body(), media_type="application/json", headers=headers)
 
 @app.get("/notification_summary/{notification_id}")
-async def notification_summary(notification_id: str, current_user: dict = Depends(get_current_user)):
+async def notification_summary(notification_id: str, request: Request, current_user: dict = Depends(get_token_claims)):
     """Fetch the summary associated with a specific notification."""
     user_id = str(current_user['_id'])
     
     # Find the specific notification
-    notification = db['notifications'].find_one({
-        '_id': ObjectId(notification_id), 
-        'user_id': user_id
-    })
+    cached = summary_read_cache.get_notification(notification_id)
+    if cached is None:
+        notification = await notification_repository.get_for_user(notification_id, user_id)
+        if notification:
+            cached = (user_id, str(notification['summary_id']))
+            summary_read_cache.put_notification(notification_id, *cached)
     
-    if not notification:
+    if not cached or cached[0] != user_id:
         raise HTTPException(status_code=404, detail="Notification not found")
     
     # Retrieve the associated summary
-    summary = get_summary_by_id(notification['summary_id'])
+    entry = await cached_summary(cached[1])
     
-    if not summary:
+    if not entry:
         raise HTTPException(status_code=404, detail="Associated summary not found")
     
-    return summary
+    return summary_response(request, entry[1], entry[2])
 
 # @app.get("/summary_by_notification/{notification_id}")
 # async def summary_by_notification(notification_id: str, current_user: dict = Depends(get_current_user)):
@@ -316,13 +392,12 @@ async def notification_summary(notification_id: str, current_user: dict = Depend
 async def trigger_notification(user_id: str):
     """Manually trigger a notification for a user."""
     try:
-        # Initialize NotificationScheduler
-        scheduler = NotificationScheduler()
-        
         # Call the private method to send notification
-        await scheduler._send_notification(user_id)
+        await notification_scheduler._send_notification(user_id)
         
         return {"success": True, "message": f"Notification manually triggered for user {user_id}"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
@@ -0,0 +1,147 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+
+from database.db_setup import get_mongo_client
+
+# FCM accepts at most 500 messages per send_each call
+FCM_MAX_BATCH = 500
+
+SendResult = namedtuple("SendResult", ["success", "message_id", "error"])
+
+
+class MessagingBackend(ABC):
+    """
+    Delivers push messages. Messages are plain dicts with token, title, body and data,
+    and results are returned as one SendResult per message, in order.
+    """
+
+    @abstractmethod
+    def send_each(self, messages: List[Dict]) -> List[SendResult]:
+        """Send a chunk of messages"""
+
+
+class FirebaseMessagingBackend(MessagingBackend):
+    def __init__(self, app=None):
+        self.app = app
+
+    def send_each(self, messages: List[Dict]) -> List[SendResult]:
+        from firebase_admin import messaging
+
+        batch = messaging.send_each([
+            messaging.Message(
+                notification=messaging.Notification(title=message['title'], body=message['body']),
+                data=message['data'],
+                token=message['token']
+            )
+            for message in messages
+        ], app=self.app)
+        return [
+            SendResult(response.success, response.message_id,
+                       None if response.success else str(response.exception))
+            for response in batch.responses
+        ]
+
+
+class FakeMessagingBackend(MessagingBackend):
+    """Records messages instead of sending them, for tests and local development"""
+
+    def __init__(self, failing_tokens=()):
+        self.failing_tokens = set(failing_tokens)
+        self.sent: List[Dict] = []
+        self.calls = 0
+
+    def send_each(self, messages: List[Dict]) -> List[SendResult]:
+        self.calls += 1
+        results = []
+        for i, message in enumerate(messages):
+            if message['token'] in self.failing_tokens:
+                results.append(SendResult(False, None, "Requested entity was not found."))
+            else:
+                self.sent.append(message)
+                results.append(SendResult(True, f"fake/{len(self.sent)}", None))
+        return results
+
+
+class BatchNotificationSender:
+    """
+    Sends notifications to many users at once.
+    FCM tokens are loaded with a single query, messages are sent with send_each in
+    chunks of up to 500 on a thread pool, and all results are logged to the
+    `notifications` collection with one insert_many.
+    """
+
+    def __init__(self, db=None, backend: Optional[MessagingBackend] = None,
+                 chunk_size: int = FCM_MAX_BATCH, max_workers: int = 4):
+        self.db = db if db is not None else get_mongo_client()
+        self.backend = backend or FirebaseMessagingBackend()
+        self.chunk_size = min(chunk_size, FCM_MAX_BATCH)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fcm-send")
+        self.logger = logging.getLogger(__name__)
+
+    def _load_tokens(self, user_ids: List[str]) -> Dict[str, str]:
+        users = self.db['users'].find(
+            {'_id': {'$in': [ObjectId(user_id) for user_id in user_ids]}, 'fcm_token': {'$exists': True}},
+            {'fcm_token': 1}
+        )
+        return {str(user['_id']): user['fcm_token'] for user in users}
+
+    async def send(self, contents: Dict[str, Dict]) -> List[Dict]:
+        """
+        Send each user their notification content and return the notification log entries.
+        `contents` maps user ids to dicts with title, body and data (including summary_id).
+        Users without an FCM token are skipped.
+        """
+        if not contents:
+            return []
+        loop = asyncio.get_running_loop()
+        tokens = await loop.run_in_executor(self.executor, self._load_tokens, list(contents))
+        for user_id in contents.keys() - tokens.keys():
+            self.logger.warning(f"No FCM token found for user {user_id}")
+
+        recipients = [user_id for user_id in contents if user_id in tokens]
+        messages = [
+            {
+                'token': tokens[user_id],
+                'title': contents[user_id]['title'],
+                'body': contents[user_id]['body'],
+                'data': contents[user_id]['data']
+            }
+            for user_id in recipients
+        ]
+        chunks = [messages[i:i + self.chunk_size] for i in range(0, len(messages), self.chunk_size)]
+        chunk_results = await asyncio.gather(
+            *(loop.run_in_executor(self.executor, self._send_chunk, chunk) for chunk in chunks)
+        )
+        results = [result for chunk in chunk_results for result in chunk]
+
+        now = datetime.utcnow()
+        logs = [
+            {
+                "user_id": user_id,
+                "summary_id": contents[user_id]['data']['summary_id'],
+                "status": "sent" if result.success else "failed",
+                "timestamp": now,
+                "response": result.message_id if result.success else result.error
+            }
+            for user_id, result in zip(recipients, results)
+        ]
+        if logs:
+            await loop.run_in_executor(self.executor, self.db['notifications'].insert_many, logs)
+        failed = sum(1 for log in logs if log['status'] == "failed")
+        self.logger.info(f"Sent {len(logs) - failed} notifications, {failed} failed")
+        return logs
+
+    def _send_chunk(self, chunk: List[Dict]) -> List[SendResult]:
+        try:
+            return self.backend.send_each(chunk)
+        except Exception as e:
+            # A failed call fails every message in the chunk, but not the other chunks
+            self.logger.error(f"Error sending notification batch: {e}")
+            return [SendResult(False, None, str(e))] * len(chunk)
@@ -0,0 +1,95 @@
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from database.db_setup import get_mongo_client
+
+
+class LeaseStore(ABC):
+    """
+    Time-limited named leases used to coordinate scheduler workers.
+    A lease is held by one owner until it expires; the owner extends it by acquiring it again.
+    """
+
+    @abstractmethod
+    def acquire(self, name: str, owner: str, ttl_seconds: float) -> bool:
+        """Take or renew the lease, returning whether `owner` now holds it"""
+
+    @abstractmethod
+    def release(self, name: str, owner: str):
+        """Give up the lease if `owner` holds it"""
+
+    @abstractmethod
+    def count_live(self, prefix: str) -> int:
+        """Number of unexpired leases whose name starts with `prefix`"""
+
+
+class MongoLeaseStore(LeaseStore):
+    def __init__(self, collection=None):
+        self.collection = collection if collection is not None else get_mongo_client()['scheduler_leases']
+
+    def acquire(self, name: str, owner: str, ttl_seconds: float) -> bool:
+        now = datetime.utcnow()
+        try:
+            lease = self.collection.find_one_and_update(
+                {'_id': name, '$or': [{'owner': owner}, {'expires_at': {'$lte': now}}]},
+                {'$set': {'owner': owner, 'expires_at': now + timedelta(seconds=ttl_seconds)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Held by another owner: the filter missed and the upsert collided with the existing lease
+            return False
+        return lease is not None and lease['owner'] == owner
+
+    def release(self, name: str, owner: str):
+        self.collection.delete_one({'_id': name, 'owner': owner})
+
+    def count_live(self, prefix: str) -> int:
+        return self.collection.count_documents({
+            '_id': {'$regex': f'^{prefix}'},
+            'expires_at': {'$gt': datetime.utcnow()}
+        })
+
+
+class RedisLeaseStore(LeaseStore):
+    """Leases as Redis keys with a TTL, for deployments that already run Redis"""
+
+    # Renew only if we still own the key, atomically
+    _RENEW = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('pexpire', KEYS[1], ARGV[2])
+    end
+    return 0
+    """
+    _RELEASE = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('del', KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(self, client=None, url: Optional[str] = None, namespace: str = "scheduler_leases:"):
+        if client is None:
+            from redis import Redis
+            client = Redis.from_url(url, decode_responses=True)
+        self.client = client
+        self.namespace = namespace
+        self._renew = client.register_script(self._RENEW)
+        self._release = client.register_script(self._RELEASE)
+
+    def acquire(self, name: str, owner: str, ttl_seconds: float) -> bool:
+        key = self.namespace + name
+        ttl_ms = int(ttl_seconds * 1000)
+        if self.client.set(key, owner, nx=True, px=ttl_ms):
+            return True
+        return bool(self._renew(keys=[key], args=[owner, ttl_ms]))
+
+    def release(self, name: str, owner: str):
+        self._release(keys=[self.namespace + name], args=[owner])
+
+    def count_live(self, prefix: str) -> int:
+        return sum(1 for _ in self.client.scan_iter(match=f"{self.namespace}{prefix}*"))
@@ -0,0 +1,265 @@
+import json
+import logging
+from abc import ABC, abstractmethod
+import os
+import time
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional
+
+from openai import OpenAI
+
+from config.config_loader import OPENAI_API_KEY
+from summarizer.summ import PROMPT_VERSION, SUMMARY_FAILED, SUMMARY_MODEL, UserContentSummarizer
+from summarizer.tokens import truncate_to_tokens
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+# OpenAI accepts at most 50,000 requests per batch input file
+MAX_REQUESTS_PER_BATCH = 50000
+
+logger = logging.getLogger(__name__)
+
+
+class BatchBackend(ABC):
+    """
+    Where batch request files are executed.
+    Files use the OpenAI Batch API JSONL format: one request per line with a
+    custom_id, method, url and body; results come back as one line per request
+    with the same custom_id and either a response or an error.
+    """
+
+    @abstractmethod
+    def submit(self, path: str) -> str:
+        """Submit a JSONL request file and return a batch id"""
+
+    @abstractmethod
+    def status(self, batch_id: str) -> str:
+        """Return the batch status, e.g. 'in_progress', 'completed' or 'failed'"""
+
+    @abstractmethod
+    def results(self, batch_id: str) -> List[Dict]:
+        """Return the result lines of a finished batch (for expired or cancelled batches, the requests that completed)"""
+
+
+class OpenAIBatchBackend(BatchBackend):
+    def __init__(self, client: Optional[OpenAI] = None, completion_window: str = "24h"):
+        self.client = client or OpenAI(api_key=OPENAI_API_KEY)
+        self.completion_window = completion_window
+
+    def submit(self, path: str) -> str:
+        with open(path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def results(self, batch_id: str) -> List[Dict]:
+        batch = self.client.batches.retrieve(batch_id)
+        lines = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                content = self.client.files.content(file_id).text
+                lines.extend(json.loads(line) for line in content.splitlines() if line.strip())
+        return lines
+
+
+class LocalBatchBackend(BatchBackend):
+    """
+    Runs batch files in-process, for tests and local development.
+    `responder` receives each request body and returns the assistant message content.
+    """
+
+    def __init__(self, responder: Callable[[Dict], str]):
+        self.responder = responder
+        self._results: Dict[str, List[Dict]] = {}
+
+    def submit(self, path: str) -> str:
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        results = []
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                try:
+                    content = self.responder(request["body"])
+                    results.append({
+                        "custom_id": request["custom_id"],
+                        "response": {
+                            "status_code": 200,
+                            "body": {"choices": [{"message": {"role": "assistant", "content": content}}]}
+                        },
+                        "error": None
+                    })
+                except Exception as e:
+                    results.append({"custom_id": request["custom_id"], "response": None, "error": {"message": str(e)}})
+        self._results[batch_id] = results
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        return "completed"
+
+    def results(self, batch_id: str) -> List[Dict]:
+        return self._results[batch_id]
+
+
+def _result_content(result: Dict) -> Optional[str]:
+    """Assistant message content of a result line, or None if the request failed"""
+    response = result.get("response")
+    if result.get("error") or not response or response.get("status_code") != 200:
+        return None
+    return response["body"]["choices"][0]["message"]["content"]
+
+
+class BatchSummaryRunner:
+    """
+    Builds digests for all users through a batch backend instead of per-request calls.
+
+    Runs in two phases. First every article that has no cached summary is summarized
+    in batch and the results are stored in the summary cache. Then one digest request
+    is batched for every user with articles not covered by their latest digest, and
+    the results are inserted into article_summaries.
+    """
+
+    def __init__(self, backend: BatchBackend, summarizer: Optional[UserContentSummarizer] = None,
+                 work_dir: str = "./batch_requests", poll_interval: float = 60.0, timeout: float = 24 * 3600):
+        self.backend = backend
+        self.summarizer = summarizer or UserContentSummarizer()
+        self.work_dir = work_dir
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+
+    def run(self, user_ids: Optional[Iterable[str]] = None, limit: int = 10):
+        """Summarize pending articles and build pending digests for the given users (default: all)"""
+        if user_ids is None:
+            user_ids = [str(uid) for uid in self.summarizer.news_collection.distinct('user_id._id')]
+        recent = {user_id: self.summarizer.get_recent_articles(user_id, limit) for user_id in user_ids}
+        recent = {user_id: articles for user_id, articles in recent.items() if articles}
+
+        summaries = self._summarize_articles(
+            [article for articles in recent.values() for article in articles if article.get('snippet')]
+        )
+        return self._build_digests(recent, summaries, limit)
+
+    def _summarize_articles(self, articles: List[Dict]) -> Dict[str, str]:
+        """Phase 1: batch-summarize articles missing from the cache, returning summaries by cache key"""
+        texts = {self.summarizer.cache_key(article['snippet']): article['snippet'] for article in articles}
+        summaries = self.summarizer.summary_cache.get_many(list(texts))
+
+        requests = [
+            self._request_line(f"article-{key}", self.summarizer.single_summary_request(text))
+            for key, text in texts.items() if key not in summaries
+        ]
+        fresh = {}
+        for custom_id, content in self._execute(requests, "articles"):
+            if content:
+                fresh[custom_id[len("article-"):]] = content.strip()
+
+        self.summarizer.summary_cache.put_many(fresh, SUMMARY_MODEL, PROMPT_VERSION)
+        logger.info(f"Batch summarized {len(fresh)} of {len(requests)} pending articles")
+        return {**summaries, **fresh}
+
+    def _build_digests(self, recent: Dict[str, List[Dict]], summaries: Dict[str, str], limit: int):
+        """Phase 2: batch one digest request per user with new articles and store the results"""
+        pending = {}
+        requests = []
+        for user_id, recent_articles in recent.items():
+            articles = [article for article in recent_articles if article.get('snippet')]
+            previous = self.summarizer.get_previous_digest(user_id)
+            new_articles, carried = self.summarizer.diff_against_previous(articles, previous, limit)
+            if not new_articles:
+                continue
+
+            new_summaries = [
+                self.summarizer.article_summary_entry(
+                    article, summaries.get(self.summarizer.cache_key(article['snippet']), SUMMARY_FAILED))
+                for article in new_articles
+            ]
+            article_summaries = new_summaries + carried
+            combined_text = self.summarizer.combine_summaries(article_summaries)
+            # A batch digest is a single request, so article text beyond the prompt budget is cut
+            # rather than reduced hierarchically
+            if previous is None:
+                body = self.summarizer.overall_summary_request(self._fit(article_summaries))
+                cited = article_summaries
+            else:
+                body = self.summarizer.incremental_summary_request(previous, self._fit(new_summaries))
+                cited = new_summaries
+
+            pending[user_id] = (recent_articles, combined_text, article_summaries, cited, previous)
+            requests.append(self._request_line(f"digest-{user_id}", body))
+
+        digests = []
+        for custom_id, content in self._execute(requests, "digests"):
+            user_id = custom_id[len("digest-"):]
+            if not content or user_id not in pending:
+                logger.error(f"Batch digest failed for user {user_id}")
+                continue
+            recent_articles, combined_text, article_summaries, cited, previous = pending[user_id]
+            try:
+                overall_summary = self.summarizer.parse_overall_summary(content, cited)
+                digest = self.summarizer.build_summary_doc(
+                    recent_articles, combined_text, overall_summary, article_summaries, previous)
+            except Exception as e:
+                # One malformed result must not discard the rest of the batch
+                logger.error(f"Batch digest for user {user_id} could not be parsed: {e}")
+                continue
+            if self.summarizer.is_failed_digest(digest):
+                logger.error(f"Batch digest failed for user {user_id}")
+                continue
+            digests.append(digest)
+
+        if digests:
+            self.summarizer.summary_collection.insert_many(digests)
+        logger.info(f"Stored {len(digests)} of {len(requests)} batch digests")
+        return digests
+
+    def _fit(self, article_summaries: List[Dict]) -> str:
+        return truncate_to_tokens(self.summarizer.combine_summaries(article_summaries),
+                                  self.summarizer.max_prompt_tokens, SUMMARY_MODEL)
+
+    def _request_line(self, custom_id: str, body: Dict) -> Dict:
+        return {"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body}
+
+    def _execute(self, requests: List[Dict], name: str):
+        """Write requests to JSONL files, submit them, wait for completion and yield (custom_id, content)"""
+        os.makedirs(self.work_dir, exist_ok=True)
+        batch_ids = []
+        for start in range(0, len(requests), MAX_REQUESTS_PER_BATCH):
+            path = os.path.join(self.work_dir, f"{name}-{int(time.time())}-{start}.jsonl")
+            with open(path, "w") as f:
+                for request in requests[start:start + MAX_REQUESTS_PER_BATCH]:
+                    f.write(json.dumps(request) + "\n")
+            batch_ids.append(self.backend.submit(path))
+
+        for batch_id in batch_ids:
+            self._wait(batch_id)
+            for result in self.backend.results(batch_id):
+                yield result["custom_id"], _result_content(result)
+
+    def _wait(self, batch_id: str):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            status = self.backend.status(batch_id)
+            if status == "completed":
+                return
+            if status in ("expired", "cancelled"):
+                # Requests that finished before the batch stopped still have results
+                logger.warning(f"Batch {batch_id} ended with status {status}, using its partial results")
+                return
+            if status == "failed":
+                raise RuntimeError(f"Batch {batch_id} ended with status {status}")
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Batch {batch_id} did not complete within {self.timeout}s")
+            time.sleep(self.poll_interval)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    BatchSummaryRunner(OpenAIBatchBackend()).run()
@@ -1,103 +1,623 @@
 import firebase_admin
-from firebase_admin import credentials, messaging
+from firebase_admin import credentials
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from database.db_setup import get_mongo_client
-from datetime import datetime
+from notifications.fcm_sender import BatchNotificationSender
+from notifications.leases import LeaseStore, MongoLeaseStore, RedisLeaseStore
+from summarizer.summary_retriever import get_recent_summaries_for_users
+from config.config_loader import (
+    DIGEST_PREWARM_LEAD_MINUTES,
+    DIGEST_PREWARM_SPREAD_MINUTES,
+    DIGEST_PREWARM_CONCURRENCY,
+    NOTIFICATION_DISPATCH_BATCH_SIZE,
+    NOTIFICATION_DISPATCH_CONCURRENCY,
+    NOTIFICATION_JITTER_MINUTES,
+    NOTIFICATION_SHARDS,
+    SCHEDULER_LEASE_BACKEND,
+    SCHEDULER_LEASE_TTL_SECONDS,
+    REDIS_URL,
+    NOTIFICATION_CATCHUP_MINUTES,
+    PREFERENCES_POLL_SECONDS,
+    SCHEDULE_RECONCILE_CRON
+)
+from data_ingestion.newsapi_ingestion import save_news_to_db
+from user_management.preferences import get_user_preferences
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
+import asyncio
+import hashlib
+import json
 import logging
+import math
+import os
+import socket
+import threading
+import uuid
 import pytz
-from typing import List, Dict
+import zlib
+from typing import List, Dict, Iterable, Optional
 from bson import ObjectId
+from fastapi import HTTPException
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def prewarm_minute_of_day(user_id: str, time: str, lead_minutes: int, spread_minutes: int) -> int:
+    """
+    Minute of the day at which to pre-warm a user's digest for a notification at `time` ("HH:MM").
+    Each user gets a stable offset within the spread window, so users sharing a popular
+    notification time are pre-warmed over several minutes instead of all at once.
+    """
+    hour, minute = map(int, time.split(':'))
+    offset = zlib.crc32(f"{user_id}:{time}".encode()) % spread_minutes if spread_minutes > 0 else 0
+    return (hour * 60 + minute - lead_minutes - offset) % MINUTES_PER_DAY
+
+
+def shard_for(user_id: str, num_shards: int) -> int:
+    """Stable shard of a user, used to split dispatching between scheduler workers"""
+    return zlib.crc32(user_id.encode()) % num_shards
+
+
+def utc_offset_minutes(timezone: str, at: Optional[datetime] = None) -> int:
+    """Offset of `timezone` from UTC in minutes at the UTC time `at` (default now), including DST"""
+    at = pytz.utc.localize(at or datetime.utcnow())
+    return int(at.astimezone(pytz.timezone(timezone)).utcoffset().total_seconds() // 60)
+
+
+def utc_minute_of_day(time: str, timezone: str = "UTC", at: Optional[datetime] = None) -> int:
+    """UTC minute of the day of local `time` ("HH:MM") in `timezone`, using the offset in effect at `at`"""
+    hour, minute = map(int, time.split(':'))
+    return (hour * 60 + minute - utc_offset_minutes(timezone, at)) % MINUTES_PER_DAY
+
+
+def jitter_minutes(user_id: str, time: str, window: int) -> int:
+    """Stable per-user delay within `window` minutes, spreading users who picked the same time"""
+    return zlib.crc32(f"jitter:{user_id}:{time}".encode()) % window if window > 0 else 0
+
 
 class NotificationScheduler:
-    def __init__(self):
+    """
+    Sends notifications and pre-warms digests from a minute-bucketed schedule.
+
+    Instead of one cron job per user and time, each user's notification times are
+    planned into the `notification_schedule` collection as UTC minute-of-day buckets.
+    A single job runs every minute, looks up the users due in the current bucket
+    through an index on the bucket fields, and dispatches them in batches, so the
+    per-minute cost depends only on the number of users due.
+
+    With a lease store, several workers can run the scheduler at once. Users are
+    assigned to a fixed number of shards, each worker leases a fair share of the
+    shards and only dispatches users in shards it holds, and leases of a worker
+    that stops renewing them expire after `lease_ttl_seconds` so others take over.
+    Every send is additionally claimed in `notification_claims` under a unique key
+    per user and minute, so a user is notified once even while a shard changes hands.
+    A claim is released when its send fails, and a claim still pending after
+    `lease_ttl_seconds` (its worker died mid-send) can be taken over, so a claimed
+    notification is never silently dropped.
+
+    The schedule and the progress of dispatching are persisted, so a restarted
+    worker resumes without rebuilding anything: on startup only users whose
+    preferences changed since the last planning pass are re-planned, and minutes
+    missed while a shard had no live owner (up to `catchup_minutes`) are sent late.
+
+    Preference changes are applied as they happen by tailing a change stream on
+    `user_preferences` and re-planning only the changed user. Deployments without
+    a replica set fall back to polling for documents with a newer `updated_at`.
+
+    Notification times are local to each user's timezone and are normalized to UTC
+    buckets with the offset currently in effect; an hourly pass re-plans only the
+    users in timezones whose offset has since changed (DST). Sends can be spread
+    over `jitter_minutes` after the chosen time to flatten popular minutes.
+    """
+
+    def __init__(self, summarizer=None,
+                 prewarm_lead_minutes: int = DIGEST_PREWARM_LEAD_MINUTES,
+                 prewarm_spread_minutes: int = DIGEST_PREWARM_SPREAD_MINUTES,
+                 prewarm_concurrency: int = DIGEST_PREWARM_CONCURRENCY,
+                 dispatch_batch_size: int = NOTIFICATION_DISPATCH_BATCH_SIZE,
+                 dispatch_concurrency: int = NOTIFICATION_DISPATCH_CONCURRENCY,
+                 jitter_minutes: int = NOTIFICATION_JITTER_MINUTES,
+                 sender: Optional[BatchNotificationSender] = None,
+                 num_shards: int = NOTIFICATION_SHARDS,
+                 lease_store: Optional[LeaseStore] = None,
+                 lease_ttl_seconds: float = SCHEDULER_LEASE_TTL_SECONDS,
+                 catchup_minutes: int = NOTIFICATION_CATCHUP_MINUTES,
+                 preferences_poll_seconds: float = PREFERENCES_POLL_SECONDS,
+                 reconcile_cron: str = SCHEDULE_RECONCILE_CRON):
         self.db = get_mongo_client()
         self.scheduler = AsyncIOScheduler()
         self.logger = logging.getLogger(__name__)
         
         # Collections
         self.users_collection = self.db['users']
+        self.preferences_collection = self.db['user_preferences']
+        self.schedule_collection = self.db['notification_schedule']
         self.summary_collection = self.db['article_summaries']
+        self.claims_collection = self.db['notification_claims']
+        self.state_collection = self.db['scheduler_state']
+        self.preferences_collection.create_index('updated_at')
+        self.schedule_collection.create_index([('minutes', ASCENDING), ('shard', ASCENDING)])
+        self.schedule_collection.create_index([('prewarm_minutes', ASCENDING), ('shard', ASCENDING)])
+        self.schedule_collection.create_index([('timezone', ASCENDING), ('utc_offset', ASCENDING)])
+        self.claims_collection.create_index('created_at', expireAfterSeconds=2 * 24 * 3600)
+        self.summary_collection.create_index([('user_id._id', ASCENDING), ('created_at', DESCENDING)])
+        self.dispatch_batch_size = dispatch_batch_size
+        self.dispatch_concurrency = dispatch_concurrency
+        self.jitter_minutes = jitter_minutes
+        self.catchup_minutes = catchup_minutes
+        self.preferences_poll_seconds = preferences_poll_seconds
+        self.reconcile_cron = reconcile_cron
+        self._stopping = threading.Event()
+
+        # Sharding between workers
+        self.num_shards = num_shards
+        self.lease_store = lease_store if lease_store is not None else self._default_lease_store()
+        self.lease_ttl_seconds = lease_ttl_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.owned_shards = set(range(num_shards)) if self.lease_store is None else set()
+
+        # Digest pre-warming
+        if summarizer is None:
+            from summarizer.summ import UserContentSummarizer
+            summarizer = UserContentSummarizer()
+        self.summarizer = summarizer
+        self.prewarm_lead_minutes = prewarm_lead_minutes
+        self.prewarm_spread_minutes = prewarm_spread_minutes
+        self._prewarm_semaphore = asyncio.Semaphore(prewarm_concurrency)
+        self._prewarm_tasks = set()
 
         # Initialize Firebase Admin SDK
-        cred = credentials.Certificate('/etc/secrets/smart-notifications-9caa0-firebase-adminsdk-xt9d4-0ed2832b13.json')
-        firebase_admin.initialize_app(cred)
+        try:
+            firebase_admin.get_app()
+        except ValueError:
+            cred = credentials.Certificate('/etc/secrets/smart-notifications-9caa0-firebase-adminsdk-xt9d4-0ed2832b13.json')
+            firebase_admin.initialize_app(cred)
+        self.sender = sender or BatchNotificationSender(db=self.db)
 
         
         # Initialize scheduler
         self._init_scheduler()
 
+    def _default_lease_store(self) -> Optional[LeaseStore]:
+        if SCHEDULER_LEASE_BACKEND == "mongo":
+            return MongoLeaseStore(self.db['scheduler_leases'])
+        if SCHEDULER_LEASE_BACKEND == "redis":
+            return RedisLeaseStore(url=REDIS_URL)
+        return None
+
     def _init_scheduler(self):
         """Initialize the scheduler and add default jobs"""
         if not self.scheduler.running:
             self.scheduler.start()
-            # Add a job to check and update user schedules daily
+            if self.lease_store is not None:
+                # Renew well within the TTL so a live worker never loses its shards
+                self.scheduler.add_job(
+                    self._rebalance_shards,
+                    'interval',
+                    seconds=self.lease_ttl_seconds / 3,
+                    id='rebalance_shards',
+                    replace_existing=True,
+                    max_instances=1,
+                    next_run_time=datetime.now()
+                )
+            if self.reconcile_cron:
+                # Opt-in full re-plan, as a safety net against missed preference changes
+                self.scheduler.add_job(
+                    self._update_user_schedules,
+                    CronTrigger.from_crontab(self.reconcile_cron),
+                    id='update_schedules',
+                    replace_existing=True
+                )
+            # Follow DST changes in the timezones users are planned in
             self.scheduler.add_job(
-                self._update_user_schedules,
-                CronTrigger(hour=0, minute=0),  # Run at midnight
-                id='update_schedules',
+                self._replan_shifted_timezones,
+                CronTrigger(minute=1),
+                id='replan_timezones',
                 replace_existing=True
             )
+            # Pick up preference changes made while no scheduler was running
+            self.scheduler.add_job(self._catch_up_schedules, id='catch_up_schedules', replace_existing=True)
+            # Then follow further changes as they are made
+            self.scheduler.add_job(self._follow_preferences, id='follow_preferences', replace_existing=True)
+            # Dispatch the users due in each minute bucket
+            self.scheduler.add_job(
+                self._dispatch_due,
+                CronTrigger(minute='*'),
+                id='dispatch_notifications',
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True
+            )
+
+    def _plan_hash(self, notification_times: List[str], timezone: str) -> str:
+        """Fingerprint of everything a plan depends on, used to skip re-planning unchanged users"""
+        key = json.dumps([sorted(notification_times), timezone, self.jitter_minutes, self.prewarm_lead_minutes,
+                          self.prewarm_spread_minutes, self.num_shards])
+        return hashlib.sha1(key.encode()).hexdigest()
+
+    def _plan(self, user_id: str, notification_times: List[str], timezone: str = "UTC") -> Dict:
+        """Schedule document holding the UTC minute buckets for a user's notification times"""
+        now = datetime.utcnow()
+        minutes = sorted({
+            (utc_minute_of_day(time, timezone, now) + jitter_minutes(user_id, time, self.jitter_minutes)) % MINUTES_PER_DAY
+            for time in notification_times
+        })
+        prewarm_minutes = []
+        if self.prewarm_lead_minutes > 0:
+            # Pre-warm from the UTC bucket so the lead is kept regardless of timezone
+            prewarm_minutes = sorted({
+                prewarm_minute_of_day(
+                    user_id, f"{minute // 60:02d}:{minute % 60:02d}",
+                    self.prewarm_lead_minutes, self.prewarm_spread_minutes
+                )
+                for minute in minutes
+            })
+        return {
+            'times': list(notification_times),
+            'timezone': timezone,
+            'utc_offset': utc_offset_minutes(timezone, now),
+            'minutes': minutes,
+            'prewarm_minutes': prewarm_minutes,
+            'shard': shard_for(user_id, self.num_shards),
+            'plan_hash': self._plan_hash(notification_times, timezone),
+            'updated_at': now
+        }
+
+    def _plan_update(self, preferences: Dict) -> UpdateOne:
+        user_id = str(preferences['user_id']['_id'])
+        plan = self._plan(user_id, preferences.get('notification_times', []), preferences.get('timezone') or "UTC")
+        return UpdateOne({'_id': user_id}, {'$set': plan}, upsert=True)
+
+    async def _rebalance_shards(self):
+        """Renew this worker's leases and take or give up shards to hold a fair share"""
+        def rebalance():
+            store, ttl = self.lease_store, self.lease_ttl_seconds
+            store.acquire(f"worker:{self.worker_id}", self.worker_id, ttl)
+            share = math.ceil(self.num_shards / max(1, store.count_live("worker:")))
+
+            owned = {shard for shard in self.owned_shards if store.acquire(f"shard:{shard}", self.worker_id, ttl)}
+            while len(owned) > share:
+                store.release(f"shard:{owned.pop()}", self.worker_id)
 
-    async def _update_user_schedules(self):
-        """Update notification schedules for all users"""
-        users = self.users_collection.find({})
-        for user in users:
-            await self.schedule_user_notifications(user)
+            # Start from a per-worker offset so workers don't all contend for the same free shards
+            start = zlib.crc32(self.worker_id.encode()) % self.num_shards
+            for i in range(self.num_shards):
+                if len(owned) >= share:
+                    break
+                shard = (start + i) % self.num_shards
+                if shard not in owned and store.acquire(f"shard:{shard}", self.worker_id, ttl):
+                    owned.add(shard)
+            return owned
 
-    async def schedule_user_notifications(self, user: Dict):
-        """Schedule notifications for a specific user based on their preferences"""
         try:
-            user_id = str(user['_id'])
-            notification_times = user.get('preferences', {}).get('notification_times', [])
-            
-            # Remove existing schedules for this user
-            existing_jobs = [job for job in self.scheduler.get_jobs() 
-                           if job.id.startswith(f'notify_user_{user_id}')]
-            for job in existing_jobs:
-                self.scheduler.remove_job(job.id)
-            
-            # Schedule new notifications
-            for time in notification_times:
-                hour, minute = map(int, time.split(':'))
-                job_id = f'notify_user_{user_id}_{time}'
-                
-                self.scheduler.add_job(
-                    self._send_notification,
-                    CronTrigger(hour=hour, minute=minute),
-                    id=job_id,
-                    args=[user_id],
-                    replace_existing=True
+            owned = await asyncio.to_thread(rebalance)
+        except Exception as e:
+            self.logger.error(f"Error renewing scheduler leases: {e}")
+            # Stop dispatching rather than risk acting on leases that may have expired
+            owned = set()
+        if owned != self.owned_shards:
+            self.logger.info(f"Worker {self.worker_id} now owns shards {sorted(owned)}")
+        self.owned_shards = owned
+
+    def shutdown(self):
+        """Stop the scheduler and hand this worker's shards back immediately"""
+        self._stopping.set()
+        if self.scheduler.running:
+            self.scheduler.shutdown(wait=False)
+        if self.lease_store is not None:
+            for shard in self.owned_shards:
+                self.lease_store.release(f"shard:{shard}", self.worker_id)
+            self.lease_store.release(f"worker:{self.worker_id}", self.worker_id)
+            self.owned_shards = set()
+
+    async def _replan_shifted_timezones(self):
+        """Re-plan users whose timezone's UTC offset differs from the one their plan was built with"""
+        def replan():
+            updates = []
+            for timezone in self.schedule_collection.distinct('timezone'):
+                offset = utc_offset_minutes(timezone)
+                stale = self.schedule_collection.find(
+                    {'timezone': timezone, 'utc_offset': {'$ne': offset}}, {'times': 1}
+                )
+                updates.extend(
+                    UpdateOne({'_id': doc['_id']}, {'$set': self._plan(doc['_id'], doc.get('times', []), timezone)})
+                    for doc in stale
                 )
-                
-            self.logger.info(f"Scheduled notifications for user {user_id} at times: {notification_times}")
-            
+            if updates:
+                self.schedule_collection.bulk_write(updates, ordered=False)
+            return len(updates)
+
+        try:
+            count = await asyncio.to_thread(replan)
+            if count:
+                self.logger.info(f"Re-planned {count} users after timezone offset changes")
+        except Exception as e:
+            self.logger.error(f"Error re-planning timezone offset changes: {e}")
+
+    async def _catch_up_schedules(self):
+        """Re-plan only the users whose preferences changed since the last planning pass"""
+        state = await asyncio.to_thread(self.state_collection.find_one, {'_id': 'preferences_checkpoint'})
+        # Without a checkpoint nothing has been planned yet, so plan everyone
+        await self._update_user_schedules(since=state['updated_at'] if state else None)
+
+    async def _update_user_schedules(self, since: Optional[str] = None):
+        """
+        Re-plan the notification schedule for all users, or for users whose preferences
+        were updated after `since`, writing only plans that changed in one bulk write
+        """
+        if since is None and self.lease_store is not None and not await asyncio.to_thread(
+                self.lease_store.acquire, "replan", self.worker_id, 600):
+            # Another worker is already re-planning everyone
+            return
+
+        def replan():
+            query = {} if since is None else {'updated_at': {'$gt': since}}
+            preferences = list(self.preferences_collection.find(
+                query, {'user_id._id': 1, 'notification_times': 1, 'timezone': 1, 'updated_at': 1}
+            ))
+            if not preferences:
+                return 0, 0
+
+            user_ids = [str(doc['user_id']['_id']) for doc in preferences]
+            schedule_query = {} if since is None else {'_id': {'$in': user_ids}}
+            planned = {
+                doc['_id']: doc.get('plan_hash')
+                for doc in self.schedule_collection.find(schedule_query, {'plan_hash': 1})
+            }
+            updates = [
+                self._plan_update(doc) for user_id, doc in zip(user_ids, preferences)
+                if planned.get(user_id) != self._plan_hash(doc.get('notification_times', []), doc.get('timezone') or "UTC")
+            ]
+            if updates:
+                self.schedule_collection.bulk_write(updates, ordered=False)
+
+            self._save_preferences_checkpoint(
+                max((doc['updated_at'] for doc in preferences if doc.get('updated_at')), default=None)
+            )
+            return len(preferences), len(updates)
+
+        checked, count = await asyncio.to_thread(replan)
+        self.logger.info(f"Re-planned notification schedules for {count} of {checked} users")
+
+    def _save_preferences_checkpoint(self, updated_at: Optional[str]):
+        if updated_at:
+            self.state_collection.update_one(
+                {'_id': 'preferences_checkpoint'},
+                {'$max': {'updated_at': updated_at}},
+                upsert=True
+            )
+
+    async def _follow_preferences(self):
+        """Apply user_preferences changes to the schedule as they happen, polling if change streams are unsupported"""
+        while not self._stopping.is_set():
+            try:
+                # Returns on shutdown or when the stream is invalidated, in which case it is reopened
+                await asyncio.to_thread(self._watch_preferences)
+            except OperationFailure as e:
+                if e.code == 40573 or 'replica set' in str(e):
+                    self.logger.info("Change streams unavailable, polling user_preferences for changes")
+                    self.scheduler.add_job(
+                        self._catch_up_schedules,
+                        'interval',
+                        seconds=self.preferences_poll_seconds,
+                        id='poll_preferences',
+                        replace_existing=True,
+                        max_instances=1
+                    )
+                    return
+                if e.code == 286:
+                    # Resume point fell off the oplog: catch up from the checkpoint and start a fresh stream
+                    self.logger.warning("Preferences change stream history lost, catching up")
+                    await asyncio.to_thread(self.state_collection.delete_one, {'_id': 'preferences_stream'})
+                    await self._catch_up_schedules()
+                    continue
+                self.logger.error(f"Preferences change stream failed: {e}")
+            except Exception as e:
+                self.logger.error(f"Preferences change stream failed: {e}")
+            await asyncio.sleep(self.preferences_poll_seconds)
+
+    def _watch_preferences(self):
+        """Blocking loop re-planning users from the user_preferences change stream until shutdown"""
+        state = self.state_collection.find_one({'_id': 'preferences_stream'})
+        pipeline = [{'$match': {'operationType': {'$in': ['insert', 'update', 'replace']}}}]
+        with self.preferences_collection.watch(
+                pipeline,
+                full_document='updateLookup',
+                resume_after=state.get('resume_token') if state else None,
+                max_await_time_ms=1000) as stream:
+            while not self._stopping.is_set() and stream.alive:
+                change = stream.try_next()
+                if change is None:
+                    continue
+                preferences = change.get('fullDocument')
+                if preferences:
+                    self.schedule_collection.bulk_write([self._plan_update(preferences)])
+                    self._save_preferences_checkpoint(preferences.get('updated_at'))
+                self.state_collection.update_one(
+                    {'_id': 'preferences_stream'},
+                    {'$set': {'resume_token': stream.resume_token}},
+                    upsert=True
+                )
+
+    async def schedule_user_notifications(self, preferences: Dict):
+        """Plan notifications for a specific user from their preferences document"""
+        user_id = str(preferences['user_id']['_id'])
+        try:
+            await asyncio.to_thread(self.schedule_collection.bulk_write, [self._plan_update(preferences)])
+            self.logger.info(f"Scheduled notifications for user {user_id} at times: {preferences.get('notification_times', [])}")
         except Exception as e:
             self.logger.error(f"Error scheduling notifications for user {user_id}: {e}")
 
-    async def _send_notification(self, user_id: str):
-        """Send notification to user with recent summaries"""
-        # try:
-        # Get recent summaries for user
-        recent_summaries = list(self.summary_collection.find(
-        {'user_id._id': user_id}
-    ).sort('created_at', -1).limit(5))
+    def _due_user_ids(self, field: str, minute: int) -> Iterable[List[str]]:
+        """Yield batches of ids of users in this worker's shards whose `field` bucket contains `minute`"""
+        if not self.owned_shards:
+            return
+        query = {field: minute, 'shard': {'$in': sorted(self.owned_shards)}}
+        cursor = self.schedule_collection.find(query, {'_id': 1}).batch_size(self.dispatch_batch_size)
+        batch = []
+        for doc in cursor:
+            batch.append(doc['_id'])
+            if len(batch) >= self.dispatch_batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
 
+    def _missed_minutes(self, now: datetime) -> List[datetime]:
+        """Minutes before `now` that some owned shard has not dispatched yet, within the catch-up window"""
+        checkpoints = list(self.state_collection.find(
+            {'_id': {'$in': [f"dispatch:{shard}" for shard in self.owned_shards]}}, {'dispatched_at': 1}
+        ))
+        if not checkpoints:
+            # Shards never dispatched before have nothing to catch up on
+            return []
+        earliest = max(min(doc['dispatched_at'] for doc in checkpoints), now - timedelta(minutes=self.catchup_minutes + 1))
+        count = int((now - earliest).total_seconds() // 60) - 1
+        return [earliest + timedelta(minutes=i) for i in range(1, count + 1)]
 
-        print(recent_summaries)
-        
-        if not recent_summaries:
+    def _save_dispatch_checkpoint(self, now: datetime):
+        self.state_collection.bulk_write([
+            UpdateOne({'_id': f"dispatch:{shard}"}, {'$max': {'dispatched_at': now}}, upsert=True)
+            for shard in self.owned_shards
+        ], ordered=False)
+
+    async def _dispatch_due(self, now: Optional[datetime] = None):
+        """Send notifications for the current minute, and for missed minutes of the owned shards"""
+        now = (now or datetime.utcnow()).replace(second=0, microsecond=0)
+        if not self.owned_shards:
             return
-        
-        # Format notification content
-        notification_content = self._format_notification_content(recent_summaries)
-        
-        # Here you would integrate with your preferred notification service
-        # Examples: Email, Push Notifications, SMS, etc.
-        await self._send_to_notification_service(user_id, notification_content)
-            
-        # except Exception as e:
-        #     self.logger.error(f"Error sending notification to user {user_id}: {e}")
+
+        for missed in await asyncio.to_thread(self._missed_minutes, now):
+            self.logger.info(f"Catching up notifications for {missed:%H:%M}")
+            await self._dispatch_minute(missed, prewarm=False)
+        await self._dispatch_minute(now)
+        await asyncio.to_thread(self._save_dispatch_checkpoint, now)
+
+    async def _dispatch_minute(self, now: datetime, prewarm: bool = True):
+        """Send notifications and start pre-warms for the users due in the minute of `now`"""
+        minute = now.hour * 60 + now.minute
+
+        prewarm_ids = []
+        if prewarm:
+            prewarm_ids = await asyncio.to_thread(lambda: [uid for batch in self._due_user_ids('prewarm_minutes', minute) for uid in batch])
+        for user_id in prewarm_ids:
+            # Pre-warms are bounded by their own semaphore and must not delay sending
+            task = asyncio.create_task(self._prewarm_digest(user_id))
+            self._prewarm_tasks.add(task)
+            task.add_done_callback(self._prewarm_tasks.discard)
+
+        batches = await asyncio.to_thread(lambda: list(self._due_user_ids('minutes', minute)))
+        semaphore = asyncio.Semaphore(max(1, self.dispatch_concurrency))
+
+        async def dispatch(batch: List[str]) -> int:
+            async with semaphore:
+                claimed = await asyncio.to_thread(self._claim, batch, now)
+                if not claimed:
+                    return 0
+                logs = await self._send_batch(claimed)
+                return await asyncio.to_thread(self._settle_claims, claimed, now, logs)
+
+        # Batches go out concurrently so a popular minute finishes within the minute
+        sent = sum(await asyncio.gather(*(dispatch(batch) for batch in batches)))
+        if sent or prewarm_ids:
+            self.logger.info(f"Dispatched {sent} notifications and {len(prewarm_ids)} pre-warms for minute {minute}")
+
+    @staticmethod
+    def _claim_id(user_id: str, now: datetime) -> str:
+        return f"{user_id}:{now.strftime('%Y-%m-%dT%H:%M')}"
+
+    def _claim(self, user_ids: List[str], now: datetime) -> List[str]:
+        """Claim the sends for this minute, returning the users no other worker has claimed"""
+        claimed_at = datetime.utcnow()
+        docs = [
+            {'_id': self._claim_id(user_id, now), 'created_at': now, 'status': 'pending', 'claimed_at': claimed_at}
+            for user_id in user_ids
+        ]
+        try:
+            self.claims_collection.insert_many(docs, ordered=False)
+            return list(user_ids)
+        except BulkWriteError as e:
+            duplicates = {error['index'] for error in e.details['writeErrors'] if error['code'] == 11000}
+            if len(duplicates) < len(e.details['writeErrors']):
+                raise
+        # Take over claims left pending by a worker that stopped before settling them
+        stale_before = claimed_at - timedelta(seconds=self.lease_ttl_seconds)
+        taken_over = {
+            i for i in duplicates
+            if self.claims_collection.find_one_and_update(
+                {'_id': docs[i]['_id'], 'status': 'pending', 'claimed_at': {'$lte': stale_before}},
+                {'$set': {'claimed_at': claimed_at}}
+            ) is not None
+        }
+        return [user_id for i, user_id in enumerate(user_ids) if i not in duplicates or i in taken_over]
+
+    def _settle_claims(self, user_ids: List[str], now: datetime, logs: List[Dict]) -> int:
+        """Mark delivered claims as sent and release the others so the send can be retried"""
+        delivered = {log['user_id'] for log in logs if log['status'] == "sent"}
+        sent_ids = [self._claim_id(user_id, now) for user_id in user_ids if user_id in delivered]
+        released_ids = [self._claim_id(user_id, now) for user_id in user_ids if user_id not in delivered]
+        if sent_ids:
+            self.claims_collection.update_many({'_id': {'$in': sent_ids}}, {'$set': {'status': 'sent'}})
+        if released_ids:
+            self.claims_collection.delete_many({'_id': {'$in': released_ids}})
+        return len(sent_ids)
+
+    async def _send_batch(self, user_ids: List[str]) -> List[Dict]:
+        """Load notification content for a batch of users and send it through the batch sender"""
+        try:
+            contents = await asyncio.to_thread(self._load_contents, user_ids)
+            return await self.sender.send(contents)
+        except Exception as e:
+            self.logger.error(f"Error sending notifications to batch of {len(user_ids)} users: {e}")
+            return []
+
+    async def _prewarm_digest(self, user_id: str):
+        """Ingest the user's news topics and update their digest ahead of a notification"""
+        async with self._prewarm_semaphore:
+            try:
+                # Only the public profile fields: the saver stores this dict on every ingested article
+                user = await asyncio.to_thread(
+                    self.users_collection.find_one,
+                    {'_id': ObjectId(user_id)},
+                    {'email': 1, 'username': 1, 'created_at': 1}
+                )
+                if not user:
+                    return
+                await asyncio.to_thread(self._ingest_news, user)
+                await self.summarizer.asummarize_recent_user_articles(user_id, incremental=True)
+                self.logger.info(f"Pre-warmed digest for user {user_id}")
+            except Exception as e:
+                self.logger.error(f"Error pre-warming digest for user {user_id}: {e}")
+
+    def _ingest_news(self, user: Dict):
+        topics = get_user_preferences(user).get('topics', [])
+        for topic in topics:
+            save_news_to_db(query=topic, user_id=user)
+
+    async def _send_notification(self, user_id: str) -> Dict:
+        """
+        Send notification to user with recent summaries and return its log entry.
+        Unlike the dispatcher, errors are raised so callers can report them.
+        """
+        contents = await asyncio.to_thread(self._load_contents, [user_id])
+        if not contents:
+            raise HTTPException(status_code=404, detail="No summaries found to notify about.")
+        logs = await self.sender.send(contents)
+        if not logs:
+            raise HTTPException(status_code=400, detail="No FCM token registered for this user.")
+        if logs[0]['status'] != "sent":
+            raise HTTPException(status_code=502, detail=f"Notification delivery failed: {logs[0]['response']}")
+        return logs[0]
+
+    def _load_contents(self, user_ids: List[str]) -> Dict[str, Dict]:
+        """Notification content for each user that has summaries"""
+        recent = get_recent_summaries_for_users(user_ids, limit=5, collection=self.summary_collection)
+        return {
+            user_id: self._format_notification_content(summaries)
+            for user_id, summaries in recent.items()
+        }
 
     def _format_notification_content(self, summaries: List[Dict]) -> Dict:
         return {
@@ -110,52 +630,3 @@ class NotificationScheduler:
                 "summary_id": str(summaries[0]['_id'])
             }
         }
-
-    async def _send_to_notification_service(self, user_id: str, content: Dict):
-        """Send Firebase Cloud Messaging notification and log the result with summary_id."""
-        # Fetch user's FCM token from the database
-        db = get_mongo_client()
-        user = db['users'].find_one({'_id': ObjectId(user_id)})
-
-        if not user or 'fcm_token' not in user:
-            self.logger.warning(f"No FCM token found for user {user_id}")
-            return
-
-        # Add the `data` field to the FCM message (with summary_id included)
-        message = messaging.Message(
-            notification=messaging.Notification(
-                title=content['title'],
-                body=content['body']
-            ),
-            data=content['data'],  # 'summary_id' is part of content['data']
-            token=user['fcm_token']
-        )
-
-        # Send a message to the device corresponding to the provided registration token
-        try:
-            response = messaging.send(message)
-            self.logger.info(f"Successfully sent message to {user_id}: {response}")
-
-            # Log the notification as 'sent' in the notifications collection
-            notification_data = {
-                "user_id": user_id,
-                "summary_id": content['data']['summary_id'],  # Store the summary_id
-                "status": "sent",
-                "timestamp": datetime.utcnow(),
-                "response": response  # Log the Firebase response
-            }
-            # Insert notification log into the database
-            db['notifications'].insert_one(notification_data)
-        except Exception as e:
-            # Log the notification as 'failed' in the notifications collection
-            self.logger.error(f"Error sending notification to user {user_id}: {e}")
-            notification_data = {
-                "user_id": user_id,
-                "summary_id": content['data']['summary_id'],  # Store the summary_id
-                "status": "failed",
-                "timestamp": datetime.utcnow(),
-                "response": str(e)  # Log the error message
-            }
-            # Insert failed notification log into the database
-            db['notifications'].insert_one(notification_data)
-
@@ -0,0 +1,83 @@
+import json
+import re
+from typing import List
+
+CITE_PATTERN = re.compile(r"\[CITE_(\d+)\]")
+
+# A trailing fragment that could still grow into a [CITE_X] tag
+PARTIAL_CITE_PATTERN = re.compile(r"\[(C(I(T(E(_\d*)?)?)?)?)?")
+
+
+class JsonStringFieldStreamer:
+    """
+    Incrementally extracts the value of one string field from a JSON object
+    that arrives in chunks, e.g. a streamed `response_format=json_object` completion.
+    Decoded text is returned as soon as it is complete; escape sequences split
+    across chunks are held back until the rest arrives.
+    """
+
+    def __init__(self, field: str):
+        self._start = re.compile(r'"%s"\s*:\s*"' % re.escape(field))
+        self._buffer = ""
+        self._in_value = False
+        self.done = False
+
+    def feed(self, chunk: str) -> str:
+        if self.done:
+            return ""
+        self._buffer += chunk
+
+        if not self._in_value:
+            match = self._start.search(self._buffer)
+            if not match:
+                return ""
+            self._buffer = self._buffer[match.end():]
+            self._in_value = True
+
+        raw = self._buffer
+        i = 0
+        while i < len(raw):
+            if raw[i] == "\\":
+                step = 6 if raw[i + 1:i + 2] == "u" else 2
+                if i + step > len(raw):
+                    break  # Incomplete escape sequence, wait for more
+                i += step
+            elif raw[i] == '"':
+                self.done = True
+                break
+            else:
+                i += 1
+
+        self._buffer = raw[i:]
+        return json.loads(f'"{raw[:i]}"')
+
+
+class CitationStreamRewriter:
+    """
+    Replaces [CITE_X] tags with markdown links to the cited article on a text stream.
+    A possible partial tag at the end of a chunk is held back until the next chunk
+    shows whether it is a citation.
+    """
+
+    def __init__(self, articles: List[dict]):
+        self.links = {
+            str(i): f"[{article['title']}]({article['url']})"
+            for i, article in enumerate(articles, 1)
+        }
+        self._pending = ""
+
+    def _replace(self, match):
+        return self.links.get(match.group(1), match.group(0))
+
+    def feed(self, text: str) -> str:
+        text = CITE_PATTERN.sub(self._replace, self._pending + text)
+        start = text.rfind("[")
+        if start != -1 and PARTIAL_CITE_PATTERN.fullmatch(text[start:]):
+            self._pending = text[start:]
+            return text[:start]
+        self._pending = ""
+        return text
+
+    def flush(self) -> str:
+        text, self._pending = self._pending, ""
+        return text
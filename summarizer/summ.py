@@ -1,162 +1,580 @@
 from database.db_setup import get_mongo_client
 from config.config_loader import OPENAI_API_KEY
-from openai import OpenAI
+from openai import AsyncOpenAI
+from summarizer.summary_cache import SummaryCache
+from summarizer.streaming import CitationStreamRewriter, JsonStringFieldStreamer
+from summarizer.tokens import count_tokens, truncate_to_tokens
+import asyncio
 import os
 import json
 import logging
 from bson import ObjectId
 from datetime import datetime
 
+SUMMARY_MODEL = "gpt-4o"
+
+# Bump whenever SINGLE_SUMMARY_PROMPT or the way article text is prepared changes,
+# so cached per-article summaries from the old prompt are no longer used
+PROMPT_VERSION = "2"
+
+# Longest article text sent for a single summary
+MAX_ARTICLE_TOKENS = 1000
+
+# Token budget for the article text of any one synthesis prompt; larger article
+# sets are reduced hierarchically (map-reduce) until they fit
+MAX_PROMPT_TOKENS = 12000
+
+# Most condensing rounds of the map-reduce; whatever still does not fit is truncated
+MAX_REDUCE_LEVELS = 3
+
+SINGLE_SUMMARY_PROMPT = "Create a concise one-paragraph summary of the key points."
+
+OVERALL_SUMMARY_PROMPT = """Create a JSON response with two elements:
+                        1. detailed_summary: A comprehensive summary (2-3 paragraphs) that synthesizes
+                        all the information. Insert [CITE_X] tags (where X is the article number)
+                        at appropriate points to reference source articles.
+                        2. highlight: A very concise (2 sentences max) summary of the most important
+                        overall points, the highlight doesn't need citations."""
+
+INCREMENTAL_SUMMARY_PROMPT = """You are updating an existing news digest with newly published articles.
+                        Create a JSON response with two elements:
+                        1. detailed_summary: Revise the existing summary (2-3 paragraphs) so it integrates
+                        the new information. Keep the existing markdown links unchanged, drop points the new
+                        articles supersede, and insert [CITE_X] tags (where X is the new article number)
+                        at appropriate points to reference the new articles.
+                        2. highlight: A very concise (2 sentences max) summary of the most important
+                        overall points, the highlight doesn't need citations."""
+
+GROUP_SUMMARY_PROMPT = """Condense these article summaries into a few short paragraphs grouped by theme.
+                        Keep every fact a later synthesis would need, and after each point keep the
+                        [CITE_X] tag of the article it came from, where X is the article number given."""
+
+SUMMARY_FAILED = "Summary generation failed"
+OVERALL_SUMMARY_FAILED = "Error generating overall summary"
+
+
 class UserContentSummarizer:
-    def __init__(self):
+    def __init__(self, max_concurrency: int = 5, request_timeout: float = 60.0, summary_cache: SummaryCache = None,
+                 max_prompt_tokens: int = MAX_PROMPT_TOKENS):
         """
         Initialize summarizer with MongoDB and OpenAI clients
+
+        Args:
+            max_concurrency: Maximum number of per-article summaries requested at once
+            request_timeout: Timeout in seconds for each OpenAI call
+            summary_cache: Cache of per-article summaries, defaults to one backed by `summary_cache`
+            max_prompt_tokens: Token budget for the article text of a single synthesis prompt
         """
         self.db = get_mongo_client()
         self.news_collection = self.db['news_articles']
         self.summary_collection = self.db['article_summaries']
-        
-        self.openai_client = OpenAI(api_key=OPENAI_API_KEY)
-        
+
+        self.async_openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+        self.max_concurrency = max_concurrency
+        self.request_timeout = request_timeout
+        self.max_prompt_tokens = max_prompt_tokens
+        self.summary_cache = summary_cache if summary_cache is not None else SummaryCache(self.db['summary_cache'])
+
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
 
-    def summarize_recent_user_articles(self, user_id: str, limit: int = 10):
+    def summarize_recent_user_articles(self, user_id: str, limit: int = 10, incremental: bool = False):
+        """Synchronous wrapper around asummarize_recent_user_articles, for scripts without an event loop"""
+        return asyncio.run(self.asummarize_recent_user_articles(user_id, limit, incremental))
+
+    async def asummarize_recent_user_articles(self, user_id: str, limit: int = 10, incremental: bool = False):
         """
         Create a combined summary of recent articles with references and a brief highlight
+
+        With incremental=True the previous digest is reused: only articles that are not in
+        its source_articles are summarized, and the detailed summary and highlight are
+        revised from the previous ones plus the new articles instead of rebuilt.
+
+        Per-article summaries are requested concurrently (at most max_concurrency at a time,
+        each bounded by request_timeout) and MongoDB calls run in worker threads, so the
+        caller's event loop is never blocked.
         """
         try:
-            # Get recent articles
-            recent_articles = list(self.news_collection.find(
-                {'user_id._id': ObjectId(user_id)}
-            ).sort('publishedAt', -1).limit(limit))
-            
+            recent_articles = await asyncio.to_thread(self.get_recent_articles, user_id, limit)
             if not recent_articles:
                 return None
-                
-            # First get individual summaries and keep track of articles for references
-            article_summaries = []
-            for article in recent_articles:
-                text = article.get('snippet')
-                if not text:
-                    continue
-                    
-                article_summaries.append({
-                    'summary': self._generate_single_summary(text),
-                    'title': article.get('title', ''),
-                    'url': article.get('url', ''),
-                    'id': str(article['_id'])  # Convert ObjectId to string
-                })
-
-            # Create text for overall summarization with reference points
-            combined_text = "Here are the key points from multiple articles:\n\n"
-            for i, article in enumerate(article_summaries, 1):
-                combined_text += f"Article {i}: {article['summary']}\n\n"
-
-            print(combined_text)
-            print(article_summaries)
-            # Generate overall summary with reference points and highlight
-            overall_summary = self._generate_overall_summary(combined_text, article_summaries)
-            print(overall_summary)
-            
-            # Create summary document with string IDs
-            summary_doc = {
-                'user_id': {
-                    '_id': str(recent_articles[0]['user_id']['_id']),  # Convert ObjectId to string
-                    'email': recent_articles[0]['user_id']['email'],
-                    'username': recent_articles[0]['user_id']['username'],
-                    'created_at': recent_articles[0]['user_id']['created_at']
-                },
-                'combined_summaries': combined_text, # For the concatenated summaries  
-                'detailed_summary': overall_summary['detailed_summary'],
-                'highlight_summary': overall_summary['highlight'],
-                'source_articles': [{
-                    'article_id': art['id'],
-                    'title': art['title'],
-                    'url': art['url']
-                } for art in article_summaries],
-                'created_at': datetime.utcnow()
-            }
-            
-            # Store in MongoDB - the stored version will have ObjectIds
-            stored_doc = self.summary_collection.insert_one(summary_doc)
-            
-            # For the return value, make sure we have the stored document's ID as a string
-            summary_doc['_id'] = str(stored_doc.inserted_id)
-            
-            return summary_doc
-            
+
+            articles = [article for article in recent_articles if article.get('snippet')]
+            previous = await asyncio.to_thread(self.get_previous_digest, user_id) if incremental else None
+            new_articles, carried = self.diff_against_previous(articles, previous, limit)
+            if previous is not None and not new_articles:
+                return self._serialize_summary_doc(previous)
+
+            summaries = await self._asummarize_articles(new_articles)
+            new_summaries = [
+                self.article_summary_entry(article, summary)
+                for article, summary in zip(new_articles, summaries)
+            ]
+            article_summaries = new_summaries + carried
+            combined_text = self.combine_summaries(article_summaries)
+
+            if previous is None:
+                reduced_text = await self._areduce_for_context(article_summaries)
+                overall_summary = await self._agenerate_overall_summary(reduced_text, article_summaries)
+            else:
+                reduced_text = await self._areduce_for_context(new_summaries)
+                overall_summary = await self._agenerate_incremental_summary(previous, reduced_text, new_summaries)
+
+            summary_doc = self.build_summary_doc(recent_articles, combined_text, overall_summary, article_summaries, previous)
+            return await asyncio.to_thread(self._store_summary_doc, summary_doc)
+
         except Exception as e:
-            self.logger.error(f"Error in summarize_recent_user_articles: {e}")
+            self.logger.error(f"Error in asummarize_recent_user_articles: {e}")
             raise
 
+    async def astream_recent_user_articles(self, user_id: str, limit: int = 10):
+        """
+        Streaming variant of asummarize_recent_user_articles.
+
+        Yields events as soon as they are available:
+            {"event": "article", ...}                  one per article, cached ones first, then in completion order
+            {"event": "detailed_summary_delta", ...}   text of the detailed summary as the model writes it,
+                                                       with [CITE_X] tags already replaced by links
+            {"event": "done", "summary": ...}          the stored summary document
+        """
+        recent_articles = await asyncio.to_thread(self.get_recent_articles, user_id, limit)
+        if not recent_articles:
+            yield {"event": "done", "summary": None}
+            return
+
+        articles = [article for article in recent_articles if article.get('snippet')]
+        keys = [self.cache_key(article['snippet']) for article in articles]
+        cached = await asyncio.to_thread(self.summary_cache.get_many, keys)
+
+        summaries = [cached.get(key) for key in keys]
+        for i, summary in enumerate(summaries):
+            if summary is not None:
+                yield self._article_event(i, articles[i], summary)
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def _summarize(i):
+            return i, await self._agenerate_single_summary(articles[i]['snippet'], semaphore)
+
+        tasks = [asyncio.create_task(_summarize(i)) for i, summary in enumerate(summaries) if summary is None]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                i, summary = await next_done
+                summaries[i] = summary
+                yield self._article_event(i, articles[i], summary)
+        finally:
+            # The client may disconnect mid-stream
+            for task in tasks:
+                task.cancel()
+
+        await asyncio.to_thread(self._cache_summaries, {
+            keys[i]: summaries[i] for i, summary in enumerate(summaries) if keys[i] not in cached
+        })
+
+        article_summaries = [
+            self.article_summary_entry(article, summary)
+            for article, summary in zip(articles, summaries)
+        ]
+        combined_text = self.combine_summaries(article_summaries)
+
+        content = ""
+        extractor = JsonStringFieldStreamer('detailed_summary')
+        rewriter = CitationStreamRewriter(article_summaries)
+        try:
+            reduced_text = await self._areduce_for_context(article_summaries)
+            loop = asyncio.get_running_loop()
+            # request_timeout bounds the whole streamed call, not just opening the stream
+            deadline = loop.time() + self.request_timeout
+            stream = await asyncio.wait_for(
+                self.async_openai_client.chat.completions.create(
+                    **self.overall_summary_request(reduced_text), stream=True
+                ),
+                timeout=self.request_timeout
+            )
+            try:
+                chunks = stream.__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), timeout=max(0, deadline - loop.time()))
+                    except StopAsyncIteration:
+                        break
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if not delta:
+                        continue
+                    content += delta
+                    text = rewriter.feed(extractor.feed(delta))
+                    if text:
+                        yield {"event": "detailed_summary_delta", "text": text}
+            finally:
+                # Stop the response on timeout or client disconnect instead of leaving it open
+                await stream.close()
+            tail = rewriter.flush()
+            if tail:
+                yield {"event": "detailed_summary_delta", "text": tail}
+            overall_summary = self.parse_overall_summary(content, article_summaries)
+        except Exception as e:
+            self.logger.error(f"Error streaming overall summary: {e}")
+            overall_summary = self._overall_summary_error()
+
+        summary_doc = self.build_summary_doc(recent_articles, combined_text, overall_summary, article_summaries)
+        yield {"event": "done", "summary": await asyncio.to_thread(self._store_summary_doc, summary_doc)}
+
+    def _article_event(self, index: int, article: dict, summary: str):
+        return {
+            "event": "article",
+            "index": index,
+            "article_id": str(article['_id']),
+            "title": article.get('title', ''),
+            "url": article.get('url', ''),
+            "summary": summary
+        }
+
+    def get_recent_articles(self, user_id: str, limit: int):
+        return list(self.news_collection.find(
+            {'user_id._id': ObjectId(user_id)}
+        ).sort('publishedAt', -1).limit(limit))
+
+    def get_previous_digest(self, user_id: str):
+        """
+        Latest digest for the user, if it can be updated incrementally.
+        Digests created before per-article summaries were stored on source_articles
+        cannot be, so the first incremental run after that falls back to a full rebuild.
+        """
+        previous = self.summary_collection.find_one(
+            {'user_id._id': user_id},
+            sort=[('created_at', -1)]
+        )
+        if not previous or not previous.get('source_articles'):
+            return None
+        if any('summary' not in art for art in previous['source_articles']):
+            self.logger.info(f"Previous digest for user {user_id} has no per-article summaries, rebuilding")
+            return None
+        # Digests stored before failed ones stopped being persisted must not be built upon
+        if previous.get('detailed_summary') == OVERALL_SUMMARY_FAILED or any(
+                art['summary'] == SUMMARY_FAILED for art in previous['source_articles']):
+            self.logger.info(f"Previous digest for user {user_id} contains failed summaries, rebuilding")
+            return None
+        return previous
+
+    def diff_against_previous(self, articles: list, previous, limit: int):
+        """
+        Split articles into the ones not yet in the previous digest and the previous
+        digest's entries to carry over, keeping at most `limit` articles overall.
+        """
+        if previous is None:
+            return articles, []
+
+        # Articles whose summary failed are treated as new so they are retried
+        succeeded = [art for art in previous['source_articles'] if art['summary'] != SUMMARY_FAILED]
+        previous_ids = {art['article_id'] for art in succeeded}
+        new_articles = [article for article in articles if str(article['_id']) not in previous_ids]
+        carried = [{
+            'summary': art['summary'],
+            'title': art['title'],
+            'url': art['url'],
+            'id': art['article_id']
+        } for art in succeeded]
+        return new_articles, carried[:max(limit - len(new_articles), 0)]
+
+    def _serialize_summary_doc(self, summary_doc: dict):
+        summary_doc['_id'] = str(summary_doc['_id'])
+        return summary_doc
+
+    def cache_key(self, text: str):
+        return SummaryCache.make_key(SUMMARY_MODEL, PROMPT_VERSION, text)
+
+    async def _asummarize_articles(self, articles: list):
+        """
+        Per-article summaries aligned with `articles`.
+        Summaries already in the cache are reused; only new articles hit the model, concurrently.
+        """
+        keys = [self.cache_key(article['snippet']) for article in articles]
+        cached = await asyncio.to_thread(self.summary_cache.get_many, keys)
+
+        pending = {}
+        for article, key in zip(articles, keys):
+            if key not in cached:
+                pending.setdefault(key, article['snippet'])
 
-    def _generate_single_summary(self, text: str):
-        """Generate a simple summary for a single article"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        generated = await asyncio.gather(*(
+            self._agenerate_single_summary(text, semaphore) for text in pending.values()
+        ))
+        fresh = dict(zip(pending, generated))
+
+        await asyncio.to_thread(self._cache_summaries, fresh)
+        return [cached.get(key) or fresh[key] for key in keys]
+
+    def _cache_summaries(self, summaries: dict):
+        # Failed summaries are not cached so they are retried next time
+        summaries = {key: summary for key, summary in summaries.items() if summary != SUMMARY_FAILED}
         try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Create a concise one-paragraph summary of the key points."
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Summarize this text:\n\n{text[:4000]}"
-                    }
-                ],
-                temperature=0.3
+            self.summary_cache.put_many(summaries, SUMMARY_MODEL, PROMPT_VERSION)
+        except Exception as e:
+            self.logger.error(f"Error caching article summaries: {e}")
+
+    def article_summary_entry(self, article: dict, summary: str):
+        return {
+            'summary': summary,
+            'title': article.get('title', ''),
+            'url': article.get('url', ''),
+            'id': str(article['_id'])  # Convert ObjectId to string
+        }
+
+    def combine_summaries(self, article_summaries: list):
+        """Create text for overall summarization with reference points"""
+        combined_text = self._join_sections(self._article_sections(article_summaries))
+        self.logger.debug(combined_text)
+        return combined_text
+
+    def _article_sections(self, article_summaries: list):
+        return [f"Article {i}: {article['summary']}" for i, article in enumerate(article_summaries, 1)]
+
+    def _join_sections(self, sections: list):
+        return "Here are the key points from multiple articles:\n\n" + "".join(f"{section}\n\n" for section in sections)
+
+    def _group_sections(self, sections: list):
+        """Greedily pack consecutive sections into groups that fit the prompt token budget"""
+        groups, current, current_tokens = [], [], 0
+        for section in sections:
+            tokens = count_tokens(section, SUMMARY_MODEL)
+            if current and current_tokens + tokens > self.max_prompt_tokens:
+                groups.append(current)
+                current, current_tokens = [], 0
+            current.append(truncate_to_tokens(section, self.max_prompt_tokens, SUMMARY_MODEL))
+            current_tokens += min(tokens, self.max_prompt_tokens)
+        if current:
+            groups.append(current)
+        return groups
+
+    def _fits_context(self, sections: list):
+        return count_tokens(self._join_sections(sections), SUMMARY_MODEL) <= self.max_prompt_tokens
+
+    async def _areduce_for_context(self, article_summaries: list):
+        """
+        Text for a synthesis prompt over all article summaries.
+        When the summaries exceed max_prompt_tokens they are packed into groups that fit,
+        each group is condensed concurrently (keeping its [CITE_X] tags), and the process
+        repeats on the condensed groups until everything fits in one prompt, for at most
+        MAX_REDUCE_LEVELS rounds before the text is truncated.
+        """
+        sections = self._article_sections(article_summaries)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        for _ in range(MAX_REDUCE_LEVELS):
+            if self._fits_context(sections):
+                return self._join_sections(sections)
+            groups = self._group_sections(sections)
+            if len(groups) == 1:
+                break
+            sections = await asyncio.gather(*(self._agenerate_group_summary(group, semaphore) for group in groups))
+        return self._truncate_for_context(sections)
+
+    def _truncate_for_context(self, sections: list):
+        """Synthesis prompt text cut to the token budget, for sections that could not be reduced to fit"""
+        if not self._fits_context(sections):
+            self.logger.warning(f"Article summaries still exceed {self.max_prompt_tokens} tokens, truncating")
+        return truncate_to_tokens(self._join_sections(sections), self.max_prompt_tokens, SUMMARY_MODEL)
+
+    def build_summary_doc(self, recent_articles: list, combined_text: str, overall_summary: dict, article_summaries: list, previous=None):
+        """Create summary document with string IDs"""
+        summary_doc = {
+            'user_id': {
+                '_id': str(recent_articles[0]['user_id']['_id']),  # Convert ObjectId to string
+                'email': recent_articles[0]['user_id']['email'],
+                'username': recent_articles[0]['user_id']['username'],
+                'created_at': recent_articles[0]['user_id']['created_at']
+            },
+            'combined_summaries': combined_text, # For the concatenated summaries
+            'detailed_summary': overall_summary['detailed_summary'],
+            'highlight_summary': overall_summary['highlight'],
+            'source_articles': [{
+                'article_id': art['id'],
+                'title': art['title'],
+                'url': art['url'],
+                'summary': art['summary']  # Kept so the next digest can be built incrementally
+            } for art in article_summaries],
+            'created_at': datetime.utcnow()
+        }
+        if previous is not None:
+            summary_doc['previous_summary_id'] = str(previous['_id'])
+        return summary_doc
+
+    def is_failed_digest(self, summary_doc: dict):
+        return summary_doc['detailed_summary'] == OVERALL_SUMMARY_FAILED
+
+    def _store_summary_doc(self, summary_doc: dict):
+        if self.is_failed_digest(summary_doc):
+            # Not stored, so the next run builds the digest from scratch instead of revising an error
+            self.logger.warning(f"Overall summary failed for user {summary_doc['user_id']['_id']}, digest not stored")
+            summary_doc['_id'] = None
+            return summary_doc
+
+        # Store in MongoDB - the stored version will have ObjectIds
+        stored_doc = self.summary_collection.insert_one(summary_doc)
+
+        # For the return value, make sure we have the stored document's ID as a string
+        summary_doc['_id'] = str(stored_doc.inserted_id)
+
+        return summary_doc
+
+    def single_summary_request(self, text: str):
+        """Chat completion parameters for summarizing a single article"""
+        return {
+            "model": SUMMARY_MODEL,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": SINGLE_SUMMARY_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": f"Summarize this text:\n\n{truncate_to_tokens(text, MAX_ARTICLE_TOKENS, SUMMARY_MODEL)}"
+                }
+            ],
+            "temperature": 0.3
+        }
+
+    def overall_summary_request(self, combined_text: str):
+        """Chat completion parameters for the overall summary with citations and highlight"""
+        return {
+            "model": SUMMARY_MODEL,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": OVERALL_SUMMARY_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": f"Create a summary with citations from these articles:\n\n{combined_text}"
+                }
+            ],
+            "temperature": 0.3,
+            "response_format": {"type": "json_object"}
+        }
+
+    def _group_summary_request(self, sections: list):
+        """Chat completion parameters for condensing one group of article summaries (the map step)"""
+        return {
+            "model": SUMMARY_MODEL,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": GROUP_SUMMARY_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": "\n\n".join(sections)
+                }
+            ],
+            "temperature": 0.3
+        }
+
+    def incremental_summary_request(self, previous: dict, new_text: str):
+        """Chat completion parameters for revising a previous digest with new articles"""
+        return {
+            "model": SUMMARY_MODEL,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": INCREMENTAL_SUMMARY_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": (
+                        f"Existing summary:\n\n{previous['detailed_summary']}\n\n"
+                        f"Existing highlight:\n\n{previous['highlight_summary']}\n\n"
+                        f"New articles:\n\n{new_text}"
+                    )
+                }
+            ],
+            "temperature": 0.3,
+            "response_format": {"type": "json_object"}
+        }
+
+    def parse_overall_summary(self, content: str, articles: list):
+        summary_data = json.loads(content)
+
+        # Replace citation tags with actual links
+        detailed_summary = summary_data['detailed_summary']
+        for i, article in enumerate(articles, 1):
+            cite_tag = f"[CITE_{i}]"
+            if cite_tag in detailed_summary:
+                detailed_summary = detailed_summary.replace(
+                    cite_tag,
+                    f"[{article['title']}]({article['url']})"
+                )
+
+        return {
+            "detailed_summary": detailed_summary,
+            "highlight": summary_data['highlight']
+        }
+
+    def _overall_summary_error(self):
+        return {
+            "detailed_summary": OVERALL_SUMMARY_FAILED,
+            "highlight": "Error generating highlight"
+        }
+
+    async def _agenerate_single_summary(self, text: str, semaphore: asyncio.Semaphore):
+        """Generate a simple summary for a single article, bounded by the semaphore and request_timeout"""
+        async with semaphore:
+            try:
+                response = await asyncio.wait_for(
+                    self.async_openai_client.chat.completions.create(**self.single_summary_request(text)),
+                    timeout=self.request_timeout
+                )
+                return response.choices[0].message.content.strip()
+            except asyncio.TimeoutError:
+                self.logger.error(f"Single summary timed out after {self.request_timeout}s")
+                return SUMMARY_FAILED
+            except Exception as e:
+                self.logger.error(f"Error generating single summary: {e}")
+                return SUMMARY_FAILED
+
+    async def _agenerate_group_summary(self, sections: list, semaphore: asyncio.Semaphore):
+        """
+        Condense a group of article summaries, falling back to the raw sections on failure.
+        Bounded by the semaphore and request_timeout.
+        """
+        async with semaphore:
+            try:
+                response = await asyncio.wait_for(
+                    self.async_openai_client.chat.completions.create(**self._group_summary_request(sections)),
+                    timeout=self.request_timeout
+                )
+                return response.choices[0].message.content.strip()
+            except Exception as e:
+                self.logger.error(f"Error generating group summary: {e}")
+                return truncate_to_tokens("\n\n".join(sections), self.max_prompt_tokens // 4, SUMMARY_MODEL)
+
+    async def _agenerate_incremental_summary(self, previous: dict, new_text: str, new_summaries: list):
+        """Revise the previous digest's summary and highlight with the new articles, bounded by request_timeout"""
+        try:
+            response = await asyncio.wait_for(
+                self.async_openai_client.chat.completions.create(**self.incremental_summary_request(previous, new_text)),
+                timeout=self.request_timeout
             )
-            return response.choices[0].message.content.strip()
+            return self.parse_overall_summary(response.choices[0].message.content, new_summaries)
+
+        except asyncio.TimeoutError:
+            self.logger.error(f"Incremental summary timed out after {self.request_timeout}s")
+            return self._overall_summary_error()
         except Exception as e:
-            self.logger.error(f"Error generating single summary: {e}")
-            return "Summary generation failed"
+            self.logger.error(f"Error generating incremental summary: {e}")
+            return self._overall_summary_error()
 
-    def _generate_overall_summary(self, combined_text: str, articles: list):
-        """Generate overall summary with references and a highlight"""
+    async def _agenerate_overall_summary(self, combined_text: str, articles: list):
+        """Generate overall summary with references and a highlight, bounded by request_timeout"""
         try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """Create a JSON response with two elements:
-                        1. detailed_summary: A comprehensive summary (2-3 paragraphs) that synthesizes 
-                        all the information. Insert [CITE_X] tags (where X is the article number) 
-                        at appropriate points to reference source articles.
-                        2. highlight: A very concise (2 sentences max) summary of the most important 
-                        overall points, the highlight doesn't need citations."""
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Create a summary with citations from these articles:\n\n{combined_text}"
-                    }
-                ],
-                temperature=0.3,
-                response_format={"type": "json_object"}
+            response = await asyncio.wait_for(
+                self.async_openai_client.chat.completions.create(**self.overall_summary_request(combined_text)),
+                timeout=self.request_timeout
             )
-            
-            summary_data = json.loads(response.choices[0].message.content)
-            
-            # Replace citation tags with actual links
-            detailed_summary = summary_data['detailed_summary']
-            for i, article in enumerate(articles, 1):
-                cite_tag = f"[CITE_{i}]"
-                if cite_tag in detailed_summary:
-                    detailed_summary = detailed_summary.replace(
-                        cite_tag,
-                        f"[{article['title']}]({article['url']})"
-                    )
-            
-            return {
-                "detailed_summary": detailed_summary,
-                "highlight": summary_data['highlight']
-            }
-            
+            return self.parse_overall_summary(response.choices[0].message.content, articles)
+
+        except asyncio.TimeoutError:
+            self.logger.error(f"Overall summary timed out after {self.request_timeout}s")
+            return self._overall_summary_error()
         except Exception as e:
             self.logger.error(f"Error generating overall summary: {e}")
-            return {
-                "detailed_summary": "Error generating overall summary",
-                "highlight": "Error generating highlight"
-            }
\ No newline at end of file
+            return self._overall_summary_error()
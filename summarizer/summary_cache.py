@@ -0,0 +1,88 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from pymongo import UpdateOne
+
+from database.db_setup import get_mongo_client
+
+
+class SummaryCache:
+    """
+    Persistent cache of per-article summaries.
+
+    Entries are keyed by a hash of (model, prompt version, article text), so the
+    same snippet is summarized once no matter how many digests or users include it,
+    and changing the model or prompt naturally invalidates old entries. Lookups go
+    through an in-process LRU first and fall back to the `summary_cache` collection.
+    """
+
+    def __init__(self, collection=None, max_entries: int = 2048):
+        self.collection = collection if collection is not None else get_mongo_client()['summary_cache']
+        self.max_entries = max_entries
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, prompt_version: str, text: str) -> str:
+        content_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        return hashlib.sha256(f"{model}\x00{prompt_version}\x00{content_hash}".encode('utf-8')).hexdigest()
+
+    def _remember(self, key: str, summary: str):
+        with self._lock:
+            self._lru[key] = summary
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def _recall(self, key: str) -> Optional[str]:
+        with self._lock:
+            summary = self._lru.get(key)
+            if summary is not None:
+                self._lru.move_to_end(key)
+            return summary
+
+    def get(self, key: str) -> Optional[str]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Return cached summaries for the given keys, using one query for all LRU misses"""
+        found = {}
+        missing = []
+        for key in keys:
+            summary = self._recall(key)
+            if summary is not None:
+                found[key] = summary
+            else:
+                missing.append(key)
+
+        if missing:
+            for doc in self.collection.find({'_id': {'$in': missing}}, {'summary': 1}):
+                found[doc['_id']] = doc['summary']
+                self._remember(doc['_id'], doc['summary'])
+        return found
+
+    def put(self, key: str, summary: str, model: str, prompt_version: str):
+        self.put_many({key: summary}, model, prompt_version)
+
+    def put_many(self, summaries: Dict[str, str], model: str, prompt_version: str):
+        if not summaries:
+            return
+        now = datetime.utcnow()
+        self.collection.bulk_write([
+            UpdateOne(
+                {'_id': key},
+                {'$setOnInsert': {
+                    'summary': summary,
+                    'model': model,
+                    'prompt_version': prompt_version,
+                    'created_at': now
+                }},
+                upsert=True
+            )
+            for key, summary in summaries.items()
+        ], ordered=False)
+        for key, summary in summaries.items():
+            self._remember(key, summary)
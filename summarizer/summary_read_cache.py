@@ -0,0 +1,127 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from fastapi.encoders import jsonable_encoder
+from config.config_loader import SUMMARY_READ_CACHE_BACKEND, REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+
+class SummaryReadCache:
+    """
+    LRU of serialized summary payloads for the read endpoints.
+
+    Summaries never change after creation except for `thread_id`, so the JSON body
+    and its ETag are computed once and reused until the summary is invalidated
+    (when a chat thread is attached) or evicted. With a Redis client, invalidations
+    are also published so every worker running `listen` drops its copy; a worker
+    that loses its subscription clears all summaries, since it may have missed some.
+    Entries remember the owning user so access can be checked without reading the
+    summary again. Notification ids are also mapped to their summary, since
+    notifications are never modified.
+    """
+
+    def __init__(self, max_entries: int = 1024, redis=None, channel: str = "summary_read_cache:invalidate"):
+        self.max_entries = max_entries
+        self.redis = redis
+        self.channel = channel
+        self._payloads = OrderedDict()
+        self._notifications = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def serialize(summary: Dict) -> Tuple[bytes, str]:
+        """JSON body of a summary and its strong ETag"""
+        body = json.dumps(jsonable_encoder(summary)).encode('utf-8')
+        return body, '"%s"' % hashlib.sha1(body).hexdigest()
+
+    def _get(self, entries: OrderedDict, key: str):
+        with self._lock:
+            value = entries.get(key)
+            if value is not None:
+                entries.move_to_end(key)
+            return value
+
+    def _put(self, entries: OrderedDict, key: str, value):
+        with self._lock:
+            entries[key] = value
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+    def get(self, summary_id: str) -> Optional[Tuple[str, bytes, str]]:
+        """(owner user id, body, etag) of a cached summary"""
+        return self._get(self._payloads, summary_id)
+
+    def put(self, summary: Dict) -> Tuple[str, bytes, str]:
+        body, etag = self.serialize(summary)
+        entry = (str(summary['user_id']['_id']), body, etag)
+        self._put(self._payloads, str(summary['_id']), entry)
+        return entry
+
+    def _evict(self, summary_id: str):
+        with self._lock:
+            self._payloads.pop(summary_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._payloads.clear()
+
+    async def invalidate(self, summary_id: str):
+        """Drop a summary here and, with Redis, on every other worker"""
+        self._evict(summary_id)
+        if self.redis is not None:
+            try:
+                await self.redis.publish(self.channel, summary_id)
+            except Exception as e:
+                logger.warning(f"Summary cache invalidation broadcast failed: {e}")
+
+    async def listen(self, retry_seconds: float = 1.0):
+        """Apply invalidations published by other workers until cancelled"""
+        if self.redis is None:
+            return
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                # Anything invalidated while we were not subscribed may still be cached
+                self.clear()
+                async for message in pubsub.listen():
+                    if message['type'] == 'message':
+                        self._evict(message['data'])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Summary cache invalidation subscription failed: {e}")
+            finally:
+                await pubsub.aclose()
+            await asyncio.sleep(retry_seconds)
+
+    def get_notification(self, notification_id: str) -> Optional[Tuple[str, str]]:
+        """(owner user id, summary id) of a cached notification"""
+        return self._get(self._notifications, notification_id)
+
+    def put_notification(self, notification_id: str, user_id: str, summary_id: str):
+        self._put(self._notifications, notification_id, (user_id, summary_id))
+
+
+def make_summary_read_cache() -> SummaryReadCache:
+    redis = None
+    if SUMMARY_READ_CACHE_BACKEND == "redis":
+        from redis.asyncio import Redis
+        redis = Redis.from_url(REDIS_URL, decode_responses=True)
+    return SummaryReadCache(redis=redis)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches `etag` (weak comparison, as for GET)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag[2:] == etag if tag.startswith("W/") else tag == etag for tag in candidates)
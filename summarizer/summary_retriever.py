@@ -1,4 +1,4 @@
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from bson import ObjectId
 from database.db_setup import get_mongo_client
 
@@ -26,4 +26,39 @@ def get_summary_by_id(summary_id: str) -> Optional[Dict]:
     except Exception as e:
         # Log the error if needed
         print(f"Error retrieving summary: {str(e)}")
-        return None
\ No newline at end of file
+        return None
+
+def get_recent_summaries_for_users(user_ids: List[str], limit: int = 5, collection=None) -> Dict[str, List[Dict]]:
+    """
+    Retrieve the most recent summaries for a batch of users in one aggregation
+
+    Uses the (user_id._id, created_at) index for the match and sort, and keeps
+    only the fields needed to build a notification.
+
+    Args:
+        user_ids (List[str]): Ids of the users to look up
+        limit (int): Number of summaries to return per user, newest first
+        collection: article_summaries collection, defaults to the shared database
+
+    Returns:
+        Dict[str, List[Dict]]: Summaries with `_id` and `highlight_summary` by user id,
+        for users that have any summaries
+    """
+    if not user_ids:
+        return {}
+    if collection is None:
+        collection = get_mongo_client()['article_summaries']
+
+    pipeline = [
+        {'$match': {'user_id._id': {'$in': list(user_ids)}}},
+        {'$sort': {'user_id._id': 1, 'created_at': -1}},
+        {'$group': {
+            '_id': '$user_id._id',
+            'summaries': {'$topN': {
+                'n': limit,
+                'sortBy': {'created_at': -1},
+                'output': {'_id': '$_id', 'highlight_summary': '$highlight_summary'}
+            }}
+        }}
+    ]
+    return {group['_id']: group['summaries'] for group in collection.aggregate(pipeline)}
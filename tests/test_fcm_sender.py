@@ -0,0 +1,71 @@
+import asyncio
+
+from bson import ObjectId
+
+from notifications.fcm_sender import BatchNotificationSender, FakeMessagingBackend
+
+
+class FakeCollection:
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+        self.insert_many_calls = 0
+
+    def find(self, query, projection=None):
+        ids = set(query['_id']['$in'])
+        return [doc for doc in self.docs if doc['_id'] in ids and 'fcm_token' in doc]
+
+    def insert_many(self, docs):
+        self.insert_many_calls += 1
+        self.docs.extend(docs)
+
+
+def make_sender(user_count, failing_tokens=(), without_token=()):
+    user_ids = [str(ObjectId()) for _ in range(user_count)]
+    users = [
+        {'_id': ObjectId(user_id)} if i in without_token else {'_id': ObjectId(user_id), 'fcm_token': f"token-{i}"}
+        for i, user_id in enumerate(user_ids)
+    ]
+    db = {'users': FakeCollection(users), 'notifications': FakeCollection()}
+    backend = FakeMessagingBackend(failing_tokens)
+    contents = {
+        user_id: {'title': "Title", 'body': "Body", 'data': {'summary_id': f"summary-{i}"}}
+        for i, user_id in enumerate(user_ids)
+    }
+    return BatchNotificationSender(db=db, backend=backend), db, backend, user_ids, contents
+
+
+def test_send_chunks_messages():
+    sender, db, backend, user_ids, contents = make_sender(1203)
+    logs = asyncio.run(sender.send(contents))
+
+    assert backend.calls == 3
+    assert len(backend.sent) == 1203
+    assert [log['user_id'] for log in logs] == user_ids
+    assert all(log['status'] == "sent" for log in logs)
+
+
+def test_send_logs_partial_failure_once():
+    sender, db, backend, user_ids, contents = make_sender(10, failing_tokens={"token-2", "token-7"})
+    logs = asyncio.run(sender.send(contents))
+
+    failed = {log['user_id'] for log in logs if log['status'] == "failed"}
+    assert failed == {user_ids[2], user_ids[7]}
+    assert len(backend.sent) == 8
+    assert db['notifications'].insert_many_calls == 1
+    assert db['notifications'].docs == logs
+    assert logs[3]['summary_id'] == "summary-3"
+
+
+def test_send_skips_users_without_token():
+    sender, db, backend, user_ids, contents = make_sender(5, without_token={0, 4})
+    logs = asyncio.run(sender.send(contents))
+
+    assert [log['user_id'] for log in logs] == user_ids[1:4]
+    assert len(backend.sent) == 3
+
+
+def test_send_nothing():
+    sender, db, backend, user_ids, contents = make_sender(0)
+    assert asyncio.run(sender.send(contents)) == []
+    assert backend.calls == 0
+    assert db['notifications'].insert_many_calls == 0
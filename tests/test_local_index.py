@@ -0,0 +1,113 @@
+import time
+
+import numpy as np
+
+from chat.retrieval_graph import local_index
+from chat.retrieval_graph.local_index import LocalVectorIndex, is_stale
+
+
+def clustered_vectors(n=2000, dim=64, clusters=40, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    return centers[rng.integers(clusters, size=n)] + 0.3 * rng.normal(size=(n, dim))
+
+
+def recall_at_k(index, exact, queries, k, nprobe):
+    hits = 0
+    for query in queries:
+        expected = {exact.ids[i] for i, _ in exact.search(query, k)}
+        found = {index.ids[i] for i, _ in index.search(query, k, nprobe=nprobe)}
+        hits += len(expected & found)
+    return hits / (k * len(queries))
+
+
+def test_ivf_recall_against_flat():
+    vectors = clustered_vectors()
+    ids = [str(i) for i in range(len(vectors))]
+    flat = LocalVectorIndex.build(vectors, ids, ids, index_type="flat")
+    ivf = LocalVectorIndex.build(vectors, ids, ids, index_type="ivf", nlist=40)
+    queries = clustered_vectors(n=50, seed=1)
+
+    assert recall_at_k(ivf, flat, queries, k=10, nprobe=40) == 1.0
+    assert recall_at_k(ivf, flat, queries, k=10, nprobe=8) >= 0.9
+    assert recall_at_k(ivf, flat, queries, k=10, nprobe=1) <= recall_at_k(ivf, flat, queries, k=10, nprobe=8)
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    vectors = clustered_vectors(n=200)
+    ids = [str(i) for i in range(len(vectors))]
+    ivf = LocalVectorIndex.build(vectors, ids, ids, index_type="ivf")
+    ivf.save(tmp_path)
+    loaded = LocalVectorIndex.load(tmp_path)
+    assert loaded.index_type == "ivf"
+    assert loaded.built_at == ivf.built_at
+    assert loaded.search(vectors[3], 5) == ivf.search(vectors[3], 5)
+
+    LocalVectorIndex.build(vectors, ids, ids, index_type="flat").save(tmp_path)
+    assert LocalVectorIndex.load(tmp_path).index_type == "flat"
+
+
+def test_rebuild_while_loaded_index_in_use(tmp_path):
+    vectors = clustered_vectors(n=500)
+    ids = [str(i) for i in range(len(vectors))]
+    LocalVectorIndex.build(vectors, ids, ids).save(tmp_path)
+    in_use = LocalVectorIndex.load(tmp_path)
+    expected = in_use.search(vectors[7], 5)
+
+    # Rebuild with fewer rows several times, past the number of versions kept
+    for _ in range(3):
+        LocalVectorIndex.build(vectors[:50], ids[:50], ids[:50]).save(tmp_path)
+
+    # The mapped vectors of the old build are neither truncated nor overwritten
+    assert in_use.search(vectors[7], 5) == expected
+    assert all(int(in_use.ids[i]) < 500 for i, _ in in_use.search(vectors[400], 5))
+
+    current = LocalVectorIndex.load(tmp_path)
+    assert len(current) == 50
+    assert len(current.vectors) == len(current.texts)
+    assert len([p for p in tmp_path.iterdir() if p.is_dir()]) == local_index.KEEP_VERSIONS
+
+
+def test_load_user_index_follows_current_version(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_index, "LOCAL_INDEX_DIR", str(tmp_path))
+    monkeypatch.setattr(local_index, "_loaded", {})
+    user_id = "0123456789abcdef01234567"
+    assert local_index.load_user_index(user_id) is None
+
+    vectors = clustered_vectors(n=20)
+    ids = [str(i) for i in range(20)]
+    LocalVectorIndex.build(vectors, ids, ids).save(local_index.user_index_dir(user_id))
+    first = local_index.load_user_index(user_id)
+    assert local_index.load_user_index(user_id) is first
+
+    LocalVectorIndex.build(vectors[:10], ids[:10], ids[:10]).save(local_index.user_index_dir(user_id))
+    second = local_index.load_user_index(user_id)
+    assert second is not first and len(second) == 10
+
+
+class CountingCollection:
+    def __init__(self, count):
+        self.count = count
+        self.calls = 0
+
+    def count_documents(self, query):
+        self.calls += 1
+        return self.count
+
+
+def test_is_stale(monkeypatch):
+    monkeypatch.setattr(local_index, "_checked", {})
+    user_id = "0123456789abcdef01234567"
+    index = LocalVectorIndex.build(clustered_vectors(n=10), [str(i) for i in range(10)], [""] * 10)
+    collection = CountingCollection(10)
+
+    assert not is_stale(index, collection, user_id, check_interval=60)
+    # The count is not queried again within the check interval
+    collection.count = 11
+    assert not is_stale(index, collection, user_id, check_interval=60)
+    assert collection.calls == 1
+    assert is_stale(index, collection, user_id, check_interval=0)
+
+    collection.count = 10
+    index.built_at = time.time() - 7200
+    assert is_stale(index, collection, user_id, max_age=3600, check_interval=0)
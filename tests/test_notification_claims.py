@@ -0,0 +1,185 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+import pytest
+from pymongo.errors import BulkWriteError
+
+from notifications.leases import LeaseStore
+
+scheduler_module = pytest.importorskip("summarizer.notification_scheduler")
+NotificationScheduler = scheduler_module.NotificationScheduler
+
+NOW = datetime(2026, 10, 19, 8, 30)
+
+
+class FakeLeaseStore(LeaseStore):
+    """In-memory leases with a clock the test moves forward"""
+
+    def __init__(self):
+        self.clock = 0.0
+        self.leases = {}
+
+    def acquire(self, name, owner, ttl_seconds):
+        held = self.leases.get(name)
+        if held and held[0] != owner and held[1] > self.clock:
+            return False
+        self.leases[name] = (owner, self.clock + ttl_seconds)
+        return True
+
+    def release(self, name, owner):
+        if self.leases.get(name, (None,))[0] == owner:
+            del self.leases[name]
+
+    def count_live(self, prefix):
+        return sum(1 for name, (_, expires) in self.leases.items() if name.startswith(prefix) and expires > self.clock)
+
+
+class FakeClaimsCollection:
+    """Just enough of a collection for claims, with a unique _id"""
+
+    def __init__(self):
+        self.docs = {}
+
+    def insert_many(self, docs, ordered=True):
+        errors = []
+        for i, doc in enumerate(docs):
+            if doc['_id'] in self.docs:
+                errors.append({'index': i, 'code': 11000, 'errmsg': "duplicate key"})
+            else:
+                self.docs[doc['_id']] = dict(doc)
+        if errors:
+            raise BulkWriteError({'writeErrors': errors})
+
+    def find_one_and_update(self, query, update):
+        doc = self.docs.get(query['_id'])
+        if (doc is None or doc['status'] != query['status']
+                or doc['claimed_at'] > query['claimed_at']['$lte']):
+            return None
+        before = dict(doc)
+        doc.update(update['$set'])
+        return before
+
+    def update_many(self, query, update):
+        for claim_id in query['_id']['$in']:
+            if claim_id in self.docs:
+                self.docs[claim_id].update(update['$set'])
+
+    def delete_many(self, query):
+        for claim_id in query['_id']['$in']:
+            self.docs.pop(claim_id, None)
+
+
+def make_scheduler(worker_id="worker-a", lease_store=None, claims=None, num_shards=8):
+    # Skip __init__, which connects to MongoDB and starts APScheduler
+    scheduler = NotificationScheduler.__new__(NotificationScheduler)
+    scheduler.worker_id = worker_id
+    scheduler.lease_store = lease_store
+    scheduler.lease_ttl_seconds = 15
+    scheduler.num_shards = num_shards
+    scheduler.owned_shards = set()
+    scheduler.claims_collection = claims if claims is not None else FakeClaimsCollection()
+    scheduler.logger = logging.getLogger(__name__)
+    return scheduler
+
+
+def sent(user_id):
+    return {'user_id': user_id, 'status': "sent"}
+
+
+def failed(user_id):
+    return {'user_id': user_id, 'status': "failed"}
+
+
+def test_duplicate_claims_go_to_one_worker():
+    claims = FakeClaimsCollection()
+    first, second = make_scheduler(claims=claims), make_scheduler("worker-b", claims=claims)
+
+    assert first._claim(["u1", "u2"], NOW) == ["u1", "u2"]
+    assert second._claim(["u1", "u2", "u3"], NOW) == ["u3"]
+    # A different minute is a different claim
+    assert second._claim(["u1"], NOW + timedelta(minutes=1)) == ["u1"]
+
+
+def test_stale_pending_claim_is_taken_over():
+    claims = FakeClaimsCollection()
+    scheduler = make_scheduler(claims=claims)
+    scheduler._claim(["stale", "fresh", "done"], NOW)
+    scheduler._settle_claims(["done"], NOW, [sent("done")])
+
+    long_ago = datetime.utcnow() - timedelta(seconds=scheduler.lease_ttl_seconds + 5)
+    for user_id in ("stale", "done"):
+        claims.docs[scheduler._claim_id(user_id, NOW)]['claimed_at'] = long_ago
+
+    # Only a pending claim whose worker stopped renewing it can be taken over, never a sent one
+    assert make_scheduler("worker-b", claims=claims)._claim(["stale", "fresh", "done"], NOW) == ["stale"]
+    assert claims.docs[scheduler._claim_id("stale", NOW)]['claimed_at'] > long_ago
+
+
+def test_failed_sends_release_their_claims():
+    claims = FakeClaimsCollection()
+    scheduler = make_scheduler(claims=claims)
+    user_ids = ["u1", "u2", "u3"]
+    scheduler._claim(user_ids, NOW)
+
+    # u3 has no log entry, e.g. no FCM token or no summaries
+    assert scheduler._settle_claims(user_ids, NOW, [sent("u1"), failed("u2")]) == 1
+    assert claims.docs[scheduler._claim_id("u1", NOW)]['status'] == "sent"
+    assert set(claims.docs) == {scheduler._claim_id("u1", NOW)}
+
+    assert make_scheduler("worker-b", claims=claims)._claim(user_ids, NOW) == ["u2", "u3"]
+
+
+def test_whole_batch_failure_releases_every_claim():
+    claims = FakeClaimsCollection()
+    scheduler = make_scheduler(claims=claims)
+    scheduler._claim(["u1", "u2"], NOW)
+
+    assert scheduler._settle_claims(["u1", "u2"], NOW, []) == 0
+    assert claims.docs == {}
+
+
+def rebalance(scheduler):
+    asyncio.run(scheduler._rebalance_shards())
+    return scheduler.owned_shards
+
+
+def test_shards_are_split_fairly_and_taken_over():
+    store = FakeLeaseStore()
+    a, b = make_scheduler("worker-a", store), make_scheduler("worker-b", store)
+
+    assert rebalance(a) == set(range(8))
+    # b registers, but every shard is still leased to a
+    assert rebalance(b) == set()
+    # a sees two live workers and gives up half of its shards, which b then takes
+    assert len(rebalance(a)) == 4
+    assert len(rebalance(b)) == 4
+    assert a.owned_shards | b.owned_shards == set(range(8))
+    assert not a.owned_shards & b.owned_shards
+
+    # a stops renewing; once its leases expire b takes everything
+    store.clock += a.lease_ttl_seconds + 1
+    assert rebalance(b) == set(range(8))
+
+
+def test_uneven_shards_round_up_the_share():
+    store = FakeLeaseStore()
+    workers = [make_scheduler(f"worker-{i}", store, num_shards=7) for i in range(3)]
+    for _ in range(3):
+        for worker in workers:
+            rebalance(worker)
+
+    owned = [worker.owned_shards for worker in workers]
+    assert set().union(*owned) == set(range(7))
+    assert sum(len(shards) for shards in owned) == 7
+    assert max(len(shards) for shards in owned) == 3
+
+
+def test_lease_errors_stop_dispatching():
+    class BrokenLeaseStore(FakeLeaseStore):
+        def acquire(self, name, owner, ttl_seconds):
+            raise ConnectionError("lease store unreachable")
+
+    scheduler = make_scheduler(lease_store=BrokenLeaseStore())
+    scheduler.owned_shards = {1, 2}
+    assert rebalance(scheduler) == set()
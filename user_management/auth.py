@@ -1,13 +1,12 @@
 from datetime import datetime, timedelta
 from fastapi import HTTPException, Depends, FastAPI, Form
 from fastapi.security import OAuth2PasswordBearer
-from pymongo import MongoClient
-from passlib.context import CryptContext
 from jose import jwt, JWTError
 from typing import Optional
 from bson import ObjectId
-from config.config_loader import MONGO_URI
-from database.db_setup import get_mongo_client
+from database.repositories import UserRepository
+from user_management.user_cache import user_cache
+from user_management.password_hashing import password_hasher
 
 # OAuth2PasswordBearer setup
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")  # Changed from "login" to match standard convention
@@ -18,11 +17,10 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30  # Added token expiration
 
 # MongoDB Setup
-db = get_mongo_client()
-users_collection = db["users"]
+users = UserRepository()
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing (bcrypt runs on password_hasher's thread pool; these block and are for scripts)
+pwd_context = password_hasher.context
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -48,7 +46,7 @@ def verify_jwt(token: str) -> Optional[dict]:
     except JWTError:
         return None
 
-def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:  # Changed return type
+def _verified_claims(token: str) -> dict:
     payload = verify_jwt(token)
     if payload is None:
         raise HTTPException(
@@ -64,56 +62,88 @@ def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:  # Changed re
             detail="User ID not found in token",
             headers={"WWW-Authenticate": "Bearer"}
         )
-    
+    return payload
+
+async def get_token_claims(token: str = Depends(oauth2_scheme)) -> dict:
+    """
+    Identify the caller from the signed token alone, without a database lookup.
+    For read-only endpoints that only need the user's id; the returned dict has
+    `_id` and `email` like the user document.
+    """
+    payload = _verified_claims(token)
+    try:
+        user_id = ObjectId(payload["user_id"])
+    except Exception:
+        raise HTTPException(
+            status_code=401,
+            detail="Authentication failed",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return {"_id": user_id, "email": payload.get("email")}
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:  # Changed return type
+    payload = _verified_claims(token)
+    user_id = payload["user_id"]
+
+    cached = await user_cache.get(user_id)
+    if cached is not None:
+        return cached
+
     # Verify the user exists in the database
     try:
-        user = users_collection.find_one({"_id": ObjectId(user_id)})  # Added ObjectId conversion
-        if user is None:
-            raise HTTPException(
-                status_code=401,
-                detail="User not found",
-                headers={"WWW-Authenticate": "Bearer"}
-            )
-        
-        # Remove password hash before returning
-        user.pop("password_hash", None)
-        return user
+        user = await users.get_by_id(user_id)
     except Exception as e:
         raise HTTPException(
             status_code=401,
             detail="Authentication failed",
             headers={"WWW-Authenticate": "Bearer"}
         )
+    if user is None:
+        raise HTTPException(
+            status_code=401,
+            detail="User not found",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+    # Remove password hash before returning
+    user.pop("password_hash", None)
+    await user_cache.set(user_id, user)
+    return user
 
-def signup_user(email: str, username: Optional[str], password: str):
-    if users_collection.find_one({"email": email}):
+async def signup_user(email: str, username: Optional[str], password: str):
+    if await users.get_by_email(email):
         raise HTTPException(status_code=400, detail="Email already registered")
     
+    # Outside the try so a full hashing queue surfaces as 503, not 500
+    hashed_password = await password_hasher.hash(password)
     try:
-        hashed_password = hash_password(password)
         user = {
             "email": email,
             "username": username,
             "password_hash": hashed_password,
             "created_at": datetime.utcnow()
         }
-        result = users_collection.insert_one(user)
+        inserted_id = await users.create(user)
         
         # Return user without password hash
-        user["_id"] = str(result.inserted_id)
+        user["_id"] = str(inserted_id)
         user.pop("password_hash", None)
         return user
     except Exception as e:
         raise HTTPException(status_code=500, detail="Error creating user")
 
-def login_user(email: str = Form(...), password: str = Form(...)):
-    user = users_collection.find_one({"email": email})
-    if not user or not verify_password(password, user["password_hash"]):
+async def login_user(email: str = Form(...), password: str = Form(...)):
+    user = await users.get_by_email(email)
+    valid, new_hash = await password_hasher.verify_and_update(password, user["password_hash"]) if user else (False, None)
+    if not valid:
         raise HTTPException(
             status_code=401,
             detail="Invalid credentials",
             headers={"WWW-Authenticate": "Bearer"}
         )
+    if new_hash:
+        # Stored hash used an older work factor
+        await users.set_password_hash(user["_id"], new_hash)
     
     # Create access token
     token = create_jwt(user_id=str(user["_id"]), email=user["email"])
@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
-from database.db_setup import get_mongo_client
+from database.repositories import UserRepository
 from user_management.auth import get_current_user
+from user_management.user_cache import user_cache
 
 fcm_router = APIRouter()
+users = UserRepository()
 
 class FCMTokenRequest(BaseModel):
     fcm_token: str
@@ -13,11 +15,7 @@ async def register_fcm_token(
     request: FCMTokenRequest, 
     current_user: dict = Depends(get_current_user)
 ):
-    db = get_mongo_client()
+    modified = await users.set_fcm_token(current_user['_id'], request.fcm_token)
+    await user_cache.invalidate(current_user['_id'])
     
-    result = db['users'].update_one(
-        {'_id': current_user['_id']},
-        {'$set': {'fcm_token': request.fcm_token}}
-    )
-    
-    return {"success": result.modified_count > 0}
\ No newline at end of file
+    return {"success": modified}
\ No newline at end of file
@@ -1,5 +1,6 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, field_validator
 from typing import Optional, List
+import pytz
 
 # Schema for user creation
 class UserCreate(BaseModel):
@@ -25,3 +26,12 @@ class PreferencesUpdate(BaseModel):
     topics: List[str]
     sources: List[str]
     notification_times: List[str]
+    # IANA timezone the notification times are given in, e.g. "Europe/Berlin"
+    timezone: str = "UTC"
+
+    @field_validator('timezone')
+    @classmethod
+    def validate_timezone(cls, value: str) -> str:
+        if value not in pytz.all_timezones_set:
+            raise ValueError(f"Unknown timezone: {value}")
+        return value
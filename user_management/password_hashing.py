@@ -0,0 +1,60 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from config.config_loader import BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt off the event loop on a small dedicated thread pool.
+
+    bcrypt releases the GIL while hashing, so threads are enough to keep request
+    handling responsive. At most `max_workers` hashes run at once; further
+    requests wait in `queue_depth` and are rejected with 503 once `max_queue`
+    are waiting, so a login burst degrades logins instead of every endpoint.
+    """
+
+    def __init__(self, rounds: int = BCRYPT_ROUNDS, max_workers: int = PASSWORD_HASH_WORKERS,
+                 max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        # min_rounds flags hashes made with a lower work factor for rehashing on login
+        self.context = CryptContext(schemes=["bcrypt"], deprecated="auto",
+                                    bcrypt__rounds=rounds, bcrypt__min_rounds=rounds)
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._slots = asyncio.Semaphore(max_workers)
+        self.queue_depth = 0
+        self.in_flight = 0
+
+    def stats(self) -> dict:
+        return {"queue_depth": self.queue_depth, "in_flight": self.in_flight, "max_queue": self.max_queue}
+
+    async def _run(self, fn, *args):
+        if self.queue_depth >= self.max_queue:
+            logger.warning(f"Password hashing queue full ({self.queue_depth} waiting)")
+            raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
+        self.queue_depth += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queue_depth -= 1
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Check a password, also returning a new hash if the stored one uses an outdated work factor"""
+        return await self._run(self.context.verify_and_update, password, hashed_password)
+
+
+password_hasher = PasswordHasher()
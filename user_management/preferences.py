@@ -1,4 +1,3 @@
-from datetime import datetime
 from bson import ObjectId
 import json
 from pymongo import MongoClient
@@ -15,26 +14,6 @@ class JSONEncoder(json.JSONEncoder):
             return str(o)
         return json.JSONEncoder.default(self, o)
 
-def update_user_preferences(current_user: dict, topics: list[str], sources: list[str], notification_times: list[str]):
-    preferences = {
-        "user_id": {
-            "_id": ObjectId(current_user['_id']),
-            "email": current_user['email'],
-            "username": current_user['username'],
-            "created_at": current_user['created_at']
-        },
-        "topics": topics,
-        "sources": sources,
-        "notification_times": notification_times,
-        "updated_at": datetime.utcnow().isoformat(),
-    }
-    preferences_collection.update_one(
-        {"user_id._id": ObjectId(current_user['_id'])}, 
-        {"$set": preferences}, 
-        upsert=True
-    )
-    return {"message": "Preferences updated successfully!"}
-
 def get_user_preferences(current_user: dict):
     preferences = preferences_collection.find_one({"user_id._id": ObjectId(current_user['_id'])})
     
@@ -0,0 +1,92 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from bson import json_util
+from config.config_loader import USER_CACHE_TTL_SECONDS, USER_CACHE_BACKEND, REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+
+class UserCache:
+    """
+    Short-lived cache of authenticated user documents keyed by user id.
+
+    Entries live in an in-process LRU for `ttl_seconds`. With a Redis client the
+    documents are also shared between workers, so a user looked up by one worker
+    is a cache hit on the others. Invalidation removes the entry locally and from
+    Redis; other workers may serve their local copy until it expires. Redis errors
+    are logged and treated as misses, so an outage only costs the database lookups.
+    """
+
+    def __init__(self, ttl_seconds: float = USER_CACHE_TTL_SECONDS, max_entries: int = 10000,
+                 redis=None, namespace: str = "user_cache:"):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.redis = redis
+        self.namespace = namespace
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_local(self, user_id: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return user
+
+    def _set_local(self, user_id: str, user: dict):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl_seconds, user)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def get(self, user_id: str) -> Optional[dict]:
+        user = self._get_local(user_id)
+        if user is None and self.redis is not None:
+            try:
+                cached = await self.redis.get(self.namespace + user_id)
+            except Exception as e:
+                logger.warning(f"User cache read failed: {e}")
+                cached = None
+            if cached is not None:
+                user = json_util.loads(cached)
+                self._set_local(user_id, user)
+        # Callers may modify the document they get back
+        return dict(user) if user is not None else None
+
+    async def set(self, user_id: str, user: dict):
+        self._set_local(user_id, dict(user))
+        if self.redis is not None:
+            try:
+                await self.redis.set(self.namespace + user_id, json_util.dumps(user), px=int(self.ttl_seconds * 1000))
+            except Exception as e:
+                logger.warning(f"User cache write failed: {e}")
+
+    async def invalidate(self, user_id) -> None:
+        user_id = str(user_id)
+        with self._lock:
+            self._entries.pop(user_id, None)
+        if self.redis is not None:
+            try:
+                await self.redis.delete(self.namespace + user_id)
+            except Exception as e:
+                logger.warning(f"User cache invalidation failed: {e}")
+
+
+def make_user_cache() -> UserCache:
+    redis = None
+    if USER_CACHE_BACKEND == "redis":
+        from redis.asyncio import Redis
+        redis = Redis.from_url(REDIS_URL)
+    return UserCache(redis=redis)
+
+
+user_cache = make_user_cache()